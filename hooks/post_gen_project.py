@@ -2,6 +2,19 @@ import os
 import subprocess
 
 project_dir = os.path.join(os.getcwd())
+project_slug = '{{cookiecutter.project_slug}}'
+
+ORJSON_FILES = [
+    os.path.join(project_slug, 'utils', 'renderers.py'),
+    os.path.join(project_slug, 'utils', 'parsers.py'),
+    os.path.join(project_slug, 'users', 'management', 'commands', 'bench_json.py'),
+    os.path.join(project_slug, 'users', 'tests', 'test_renderers.py'),
+]
+
+
+def remove_files(paths):
+    for path in paths:
+        os.remove(os.path.join(project_dir, path))
 
 
 def run_git_init():
@@ -10,4 +23,6 @@ def run_git_init():
 
 
 if __name__ == "__main__":
+    if '{{cookiecutter.use_orjson}}' != 'y':
+        remove_files(ORJSON_FILES)
     run_git_init()
@@ -7,3 +7,17 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
 EMAIL_USE_TLS = config('EMAIL_USE_TLS')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL')
+
+# emails of a worker are sent in batches through one SMTP connection, see utils/send_email.py
+EMAIL_BATCH_SIZE = config('EMAIL_BATCH_SIZE', default=50, cast=int)
+EMAIL_BATCH_MAX_DELAY_MS = config('EMAIL_BATCH_MAX_DELAY_MS', default=200, cast=int)
+EMAIL_MAX_RETRIES = 3
+# seconds a verification or reset email is not enqueued again for the same user, links are valid for a minute
+EMAIL_DEDUPE_WINDOW = config('EMAIL_DEDUPE_WINDOW', default=60, cast=int)
+
+# emails per second of all workers together and how many may go at once, 0 is unlimited, see utils/rate_limit.py
+EMAIL_RATE_LIMIT = config('EMAIL_RATE_LIMIT', default=0, cast=float)
+EMAIL_RATE_BURST = config('EMAIL_RATE_BURST', default=10, cast=int)
+{%- if cookiecutter.caches == 'redis' or cookiecutter.celery_message_broker == 'redis' %}
+RATE_LIMIT_REDIS_URL = config('REDIS_LOCATION', default="redis://127.0.0.1:6379")
+{%- endif %}
@@ -1,6 +1,8 @@
 from datetime import timedelta
 
+from celery.schedules import crontab
 from decouple import config
+from kombu import Queue
 
 broker_connection_retry_on_startup = True
 
@@ -12,6 +14,38 @@ broker_url = "redis://localhost:6379/0"
 result_backend = "redis://localhost:6379/0"
 {% endif %}
 worker_prefetch_multiplier = 3
+
+# tasks are routed by {{cookiecutter.project_slug}}.utils.celery_routing, start a worker per queue with `-Q <queue>`
+task_default_queue = 'default'
+task_queues = (
+    Queue('default'),
+{%- if cookiecutter.celery_message_broker == 'rabbitmq-server' %}
+    Queue('email', queue_arguments={'x-max-priority': 10}),
+{%- else %}
+    Queue('email'),
+{%- endif %}
+    Queue('storage'),
+    Queue('maintenance'),
+)
+task_routes = ('{{cookiecutter.project_slug}}.utils.celery_routing.route_task',)
+beat_schedule = {
+    'gc-avatars': {'task': '{{cookiecutter.project_slug}}.users.tasks.gc_avatars', 'schedule': crontab(hour=4, minute=0)},
+}
+{%- if cookiecutter.celery_message_broker == 'redis' %}
+# redis emulates priorities with a list per step, 0 is consumed first
+broker_transport_options = {'priority_steps': list(range(10)), 'queue_order_strategy': 'priority'}
+{%- endif %}
+
+# concurrency and prefetch of a worker started with CELERY_WORKER_PRESET=<queue>
+_worker_presets = {
+    # one email at a time per process, so a password reset is not stuck behind prefetched bulk mail
+    'email': {'worker_concurrency': 4, 'worker_prefetch_multiplier': 1},
+    'storage': {'worker_concurrency': 8, 'worker_prefetch_multiplier': 2},
+    'maintenance': {'worker_concurrency': 2, 'worker_prefetch_multiplier': 16},
+}
+_worker_preset = config('CELERY_WORKER_PRESET', default='')
+if _worker_preset:
+    globals().update(_worker_presets[_worker_preset])
 {% if cookiecutter.use_timezone_in_celery == 'y' %}
 timezone = config('TIME_ZONE')
 {% endif %}
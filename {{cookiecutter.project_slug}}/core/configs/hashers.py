@@ -0,0 +1,14 @@
+from decouple import config
+
+# pick both with `python manage.py bench_hashers --budget-ms <login latency budget>`
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='pbkdf2_sha256')
+PASSWORD_HASH_COST = config('PASSWORD_HASH_COST', default=0, cast=int)  # 0 keeps Django's default cost
+
+_hashers = {
+    'pbkdf2_sha256': '{{cookiecutter.project_slug}}.utils.hashers.PBKDF2PasswordHasher',
+    'argon2': '{{cookiecutter.project_slug}}.utils.hashers.Argon2PasswordHasher',
+    'bcrypt_sha256': '{{cookiecutter.project_slug}}.utils.hashers.BCryptSHA256PasswordHasher',
+    'scrypt': '{{cookiecutter.project_slug}}.utils.hashers.ScryptPasswordHasher',
+}
+# the first hasher makes new hashes, the others still verify (and upgrade) existing ones
+PASSWORD_HASHERS = [_hashers.pop(PASSWORD_HASHER)] + list(_hashers.values())
@@ -1,9 +1,48 @@
 from datetime import timedelta
 
+from decouple import config
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=2),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=15),
     'TOKEN_OBTAIN_SERIALIZER': '{{cookiecutter.project_slug}}.users.serializers.MyTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': '{{cookiecutter.project_slug}}.users.serializers.MyTokenRefreshSerializer',
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
 }
+
+# write OutstandingToken rows in batches of this size instead of one INSERT per login, 0 disables batching
+OUTSTANDING_TOKENS_BATCH_SIZE = config('OUTSTANDING_TOKENS_BATCH_SIZE', default=0, cast=int)
+# seconds a buffered row may wait for its batch
+OUTSTANDING_TOKENS_MAX_DELAY = 1.0
+
+# users resolved from access tokens, see utils/authentication.py
+AUTH_USER_CACHE = {
+    'maxsize': 1024,
+    # seconds another process may serve a user changed elsewhere
+    'local_timeout': 5,
+{%- if cookiecutter.caches == 'redis' %}
+    'timeout': 300,
+{%- else %}
+    # without a shared cache only the per-process cache is used
+    'timeout': 0,
+{%- endif %}
+}
+
+{% if cookiecutter.caches == 'redis' -%}
+# where refresh token blacklisting is checked and written, see utils/blacklist.py
+JWT_BLACKLIST_STORE = config(
+    'JWT_BLACKLIST_STORE', default='{{cookiecutter.project_slug}}.utils.blacklist.CacheBlacklistStore'
+)
+# used by BloomCacheBlacklistStore: 2 ** 23 bits and 7 hashes keep false positives near 1% for 800k tokens,
+# its bitmap is kept in the redis at `location`
+JWT_BLACKLIST_BLOOM = {
+    'size': 2 ** 23,
+    'hashes': 7,
+    'refresh': 5,
+    'location': (config('JWT_BLACKLIST_REDIS_URL', default='')
+                 or config('REDIS_LOCATION', default="redis://127.0.0.1:6379")),
+}
+{%- else -%}
+JWT_BLACKLIST_STORE = '{{cookiecutter.project_slug}}.utils.blacklist.DatabaseBlacklistStore'
+{%- endif %}
@@ -1,3 +1,6 @@
+from datetime import timedelta
+
+from botocore.config import Config
 from decouple import config
 
 STORAGES = {
@@ -19,3 +22,19 @@ AWS_S3_ENDPOINT_URL = config('AWS_S3_ENDPOINT_URL')
 AWS_STORAGE_BUCKET_NAME = config('AWS_STORAGE_BUCKET_NAME')
 AWS_SERVICE_NAME = config('AWS_SERVICE_NAME')
 AWS_S3_FILE_OVERWRITE = False
+# shared by the storage backend and utils/bucket.py, one pooled client per process
+AWS_S3_CLIENT_CONFIG = Config(
+    max_pool_connections=config('AWS_S3_MAX_POOL_CONNECTIONS', default=50, cast=int),
+    tcp_keepalive=True,
+    retries={'mode': 'standard', 'max_attempts': config('AWS_S3_MAX_ATTEMPTS', default=5, cast=int)},
+)
+# avatars are uploaded by clients straight to the bucket with a presigned POST
+AVATAR_CONTENT_TYPES = {'image/png': 'png', 'image/jpeg': 'jpg'}
+AVATAR_MAX_SIZE = config('AVATAR_MAX_SIZE', default=5 * 1024 * 1024, cast=int)
+AVATAR_UPLOAD_EXPIRES = 5 * 60
+# multipart avatar bodies are streamed to the bucket in parts of this size, the smallest S3 accepts
+AWS_S3_UPLOAD_PART_SIZE = 5 * 1024 * 1024
+# square renditions made from each avatar by a celery task, in WebP and JPEG
+AVATAR_RENDITION_SIZES = (64, 256, 512)
+# unreferenced avatars younger than this are kept by gc_avatars, they may be uploads waiting for confirmation
+AVATAR_GC_GRACE = timedelta(hours=config('AVATAR_GC_GRACE_HOURS', default=24, cast=int))
@@ -0,0 +1,9 @@
+# gunicorn -c core/gunicorn.conf.py core.wsgi
+import os
+
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        multiprocess.mark_process_dead(worker.pid)
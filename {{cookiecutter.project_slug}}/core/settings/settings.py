@@ -58,12 +58,15 @@ THIRD_PARTY_APPS = [
 ]
 
 LOCAL_APPS = [
-    "{{cookiecutter.project_slug}}.users.apps.UsersConfig"
+    "{{cookiecutter.project_slug}}.users.apps.UsersConfig",
+    "{{cookiecutter.project_slug}}.search.apps.SearchConfig",
+    "{{cookiecutter.project_slug}}.metrics.apps.MetricsConfig",
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    '{{cookiecutter.project_slug}}.metrics.middleware.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -153,6 +156,9 @@ USE_TZ = True
 STATIC_URL = '/static/'
 DOMAIN = config('DOMAIN', default="127.0.0.1:8000")
 
+# the bearer token Prometheus scrapes /metrics with, /metrics is not served while it is empty
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -177,13 +183,21 @@ AUTH_USER_MODEL = 'users.User'
 # Rest_Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        '{{cookiecutter.project_slug}}.utils.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_RENDERER_CLASSES': [
+{%- if cookiecutter.use_orjson == 'y' %}
+        '{{cookiecutter.project_slug}}.utils.renderers.ORJSONRenderer',
+{%- else %}
         'rest_framework.renderers.JSONRenderer',
+{%- endif %}
     ],
     'DEFAULT_PARSER_CLASSES': [
+{%- if cookiecutter.use_orjson == 'y' %}
+        '{{cookiecutter.project_slug}}.utils.parsers.ORJSONParser',
+{%- else %}
         'rest_framework.parsers.JSONParser',
+{%- endif %}
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
     ],
@@ -197,6 +211,7 @@ REST_FRAMEWORK = {
 
 from core.configs.celery_configs import *
 from core.configs.drf_spectacular import *
+from core.configs.hashers import *
 from core.configs.jwt import *
 from core.configs.SMTP_configs import *
 from core.configs.storages import *
@@ -3,6 +3,8 @@ from django.contrib import admin
 from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
 
+from {{cookiecutter.project_slug}}.metrics.views import metrics
+
 documents = [
     path('', SpectacularAPIView.as_view(), name='schema'),
     path('swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
@@ -12,7 +14,8 @@ documents = [
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('users/', include('{{cookiecutter.project_slug}}.users.urls', namespace='users')),
-    path('schema/', include(documents))
+    path('schema/', include(documents)),
+    path('metrics', metrics, name='metrics'),
 ]
 
 if settings.DEBUG and 'debug_toolbar' in settings.INSTALLED_APPS:
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class MetricsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = '{{cookiecutter.project_slug}}.metrics'
+
+    def ready(self):
+        from . import signals  # noqa: F401
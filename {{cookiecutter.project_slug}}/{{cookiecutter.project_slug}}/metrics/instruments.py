@@ -0,0 +1,43 @@
+"""
+Prometheus metrics of the project.
+With PROMETHEUS_MULTIPROC_DIR set, every gunicorn and celery prefork process writes its samples there
+and /metrics aggregates them, see views.py.
+"""
+import time
+
+from prometheus_client import Counter, Histogram
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Time to respond to a request, per URL name.', ['view', 'method', 'status'],
+)
+HTTP_REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'ORM queries run by a request, per URL name.', ['view'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+HTTP_REQUEST_DB_SECONDS = Histogram(
+    'http_request_db_duration_seconds', 'Time a request spent in ORM queries, per URL name.', ['view'],
+)
+
+CELERY_TASK_SECONDS = Histogram('celery_task_duration_seconds', 'Time a task ran in a worker.', ['task'])
+CELERY_TASK_QUEUE_WAIT_SECONDS = Histogram(
+    'celery_task_queue_wait_seconds', 'Time from publishing a task until a worker started it.', ['task', 'queue'],
+)
+CELERY_TASK_FAILURES = Counter('celery_task_failures_total', 'Tasks that raised an exception.', ['task'])
+
+S3_REQUEST_SECONDS = Histogram('s3_request_duration_seconds', 'Time of a call to the object storage.', ['operation'])
+SMTP_SEND_SECONDS = Histogram('smtp_send_duration_seconds', 'Time to hand one email to the SMTP server.')
+
+
+def instrument_s3_client(client):
+    """Times every call `client` makes through botocore's events."""
+
+    def start(context, **kwargs):
+        context['metrics_started'] = time.perf_counter()
+
+    def stop(context, model, **kwargs):
+        if 'metrics_started' in context:
+            S3_REQUEST_SECONDS.labels(model.name).observe(time.perf_counter() - context.pop('metrics_started'))
+
+    client.meta.events.register('before-parameter-build.s3', start)
+    client.meta.events.register('after-call.s3', stop)
+    return client
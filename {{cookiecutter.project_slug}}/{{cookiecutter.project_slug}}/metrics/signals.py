@@ -0,0 +1,42 @@
+import os
+import time
+
+from celery.signals import before_task_publish, task_failure, task_postrun, task_prerun, worker_process_shutdown
+from prometheus_client import multiprocess
+
+from .instruments import CELERY_TASK_FAILURES, CELERY_TASK_QUEUE_WAIT_SECONDS, CELERY_TASK_SECONDS
+
+# start times of the tasks running in this process, by task id
+started = {}
+
+
+@before_task_publish.connect
+def stamp_published_at(headers=None, **kwargs):
+    if headers is not None:
+        headers['published_at'] = time.time()
+
+
+@task_prerun.connect
+def start_task_timer(task_id, task, **kwargs):
+    started[task_id] = time.perf_counter()
+    published_at = getattr(task.request, 'published_at', None)
+    if published_at:
+        queue = (task.request.delivery_info or {}).get('routing_key') or 'default'
+        CELERY_TASK_QUEUE_WAIT_SECONDS.labels(task.name, queue).observe(max(0.0, time.time() - published_at))
+
+
+@task_postrun.connect
+def stop_task_timer(task_id, task, **kwargs):
+    if task_id in started:
+        CELERY_TASK_SECONDS.labels(task.name).observe(time.perf_counter() - started.pop(task_id))
+
+
+@task_failure.connect
+def count_task_failure(sender, **kwargs):
+    CELERY_TASK_FAILURES.labels(sender.name).inc()
+
+
+@worker_process_shutdown.connect
+def mark_worker_dead(**kwargs):
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
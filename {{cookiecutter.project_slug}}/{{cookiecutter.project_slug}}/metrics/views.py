@@ -0,0 +1,19 @@
+import os
+from hmac import compare_digest
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
+
+
+def metrics(request):
+    """Metrics of this process, or of every process writing to PROMETHEUS_MULTIPROC_DIR, for METRICS_TOKEN only."""
+    if not settings.METRICS_TOKEN:
+        raise Http404
+    if not compare_digest(request.headers.get('Authorization', ''), f'Bearer {settings.METRICS_TOKEN}'):
+        return HttpResponse(status=403)
+    registry = REGISTRY
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,18 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def restore_search_triggers(using, **kwargs):
+    from django.db import connections
+
+    from .indexes import ensure_search_triggers
+
+    ensure_search_triggers(connections[using])
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = '{{cookiecutter.project_slug}}.search'
+
+    def ready(self):
+        post_migrate.connect(restore_search_triggers, sender=self)
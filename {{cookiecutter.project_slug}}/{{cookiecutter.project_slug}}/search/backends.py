@@ -0,0 +1,87 @@
+import operator
+from functools import reduce
+
+from django.db import models
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Greatest
+
+# tables and columns covered by the indexes built in the search app migrations
+INDEXED_COLUMNS = {
+    'users_user': ('username', 'email'),
+}
+
+
+class ContainsSearchBackend:
+    """Same matching as DRF's SearchFilter: every term must be contained in one of the fields."""
+    rank_field = 'search_rank'
+
+    def __init__(self, search_fields):
+        self.search_fields = search_fields
+
+    def contains(self, terms):
+        return reduce(operator.and_, (
+            reduce(operator.or_, (models.Q(**{f'{field}__icontains': term}) for field in self.search_fields))
+            for term in terms
+        ))
+
+    def rank(self, terms):
+        return models.Value(0.0, output_field=models.FloatField())
+
+    def search(self, queryset, terms):
+        return queryset.filter(self.contains(terms)).annotate(**{self.rank_field: self.rank(terms)})
+
+
+class TrigramSearchBackend(ContainsSearchBackend):
+    """
+    PostgreSQL backend. `UPPER(col) LIKE '%term%'` is answered by the pg_trgm GIN indexes
+    built in the search app migrations, results are ranked by trigram word similarity.
+    """
+
+    def rank(self, terms):
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        similarities = [
+            Greatest(*[TrigramWordSimilarity(term, field) for field in self.search_fields])
+            if len(self.search_fields) > 1 else TrigramWordSimilarity(term, self.search_fields[0])
+            for term in terms
+        ]
+        return reduce(operator.add, similarities)
+
+
+class FTS5SearchBackend(ContainsSearchBackend):
+    """
+    SQLite backend. Matches against the `<table>_search` FTS5 shadow table (trigram tokenizer)
+    built in the search app migrations, results are ranked by bm25.
+    Terms shorter than a trigram can not be looked up in the index and fall back to icontains.
+    """
+    min_term_length = 3
+
+    def __init__(self, search_fields, table):
+        super().__init__(search_fields)
+        self.table = table
+        self.fts_table = f'{table}_search'
+
+    def match_query(self, terms):
+        columns = ' '.join(self.search_fields)
+        phrases = ' AND '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+        return '{' + columns + '} : (' + phrases + ')'
+
+    def search(self, queryset, terms):
+        indexed_terms = [term for term in terms if len(term) >= self.min_term_length]
+        short_terms = [term for term in terms if len(term) < self.min_term_length]
+        if not indexed_terms:
+            return super().search(queryset, terms)
+
+        match = self.match_query(indexed_terms)
+        queryset = queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM "{self.fts_table}" WHERE "{self.fts_table}" MATCH %s', [match])
+        )
+        if short_terms:
+            queryset = queryset.filter(self.contains(short_terms))
+        rank = RawSQL(
+            f'SELECT -rank FROM "{self.fts_table}" '
+            f'WHERE "{self.fts_table}" MATCH %s AND rowid = "{self.table}"."id"',
+            [match],
+            output_field=models.FloatField()
+        )
+        return queryset.annotate(**{self.rank_field: rank})
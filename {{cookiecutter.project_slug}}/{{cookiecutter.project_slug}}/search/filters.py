@@ -0,0 +1,43 @@
+from django.db import connections
+from rest_framework.filters import SearchFilter
+
+from .backends import INDEXED_COLUMNS, ContainsSearchBackend, TrigramSearchBackend, FTS5SearchBackend
+
+
+class IndexedSearchFilter(SearchFilter):
+    """
+    Drop-in replacement for DRF's SearchFilter that keeps the `?search=` contract
+    but answers it through the database's search indexes and orders results by relevance.
+    Views can force a backend with `search_backend`.
+    """
+
+    def get_backend(self, queryset, view, search_fields):
+        backend = getattr(view, 'search_backend', None)
+        if backend is not None:
+            return backend(search_fields)
+        table = queryset.model._meta.db_table
+        if not set(search_fields).issubset(INDEXED_COLUMNS.get(table, ())):
+            return ContainsSearchBackend(search_fields)
+        vendor = connections[queryset.db].vendor
+        if vendor == 'postgresql':
+            return TrigramSearchBackend(search_fields)
+        if vendor == 'sqlite':
+            return FTS5SearchBackend(search_fields, table)
+        return ContainsSearchBackend(search_fields)
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+
+        if not search_fields or not search_terms:
+            return queryset
+
+        backend = self.get_backend(queryset, view, [str(field) for field in search_fields])
+        queryset = backend.search(queryset, search_terms)
+        return queryset.order_by(f'-{backend.rank_field}', *queryset.query.order_by or queryset.model._meta.ordering)
+
+    def get_ordering(self, request, queryset, view):
+        # lets cursor pagination page through the results by relevance
+        if ContainsSearchBackend.rank_field in queryset.query.annotations:
+            return (f'-{ContainsSearchBackend.rank_field}',) + tuple(getattr(view.paginator, 'ordering', ()))
+        return None
@@ -0,0 +1,78 @@
+"""
+Search indexes for the tables listed in `backends.INDEXED_COLUMNS`.
+PostgreSQL gets pg_trgm GIN indexes, SQLite gets an FTS5 shadow table kept in sync by triggers.
+"""
+
+TRIGRAM_INDEXES = (
+    ('users_user_username_trgm', 'users_user', 'username'),
+    ('users_user_email_trgm', 'users_user', 'email'),
+)
+
+FTS5_TRIGGERS = {
+    'users_user_search_insert': (
+        'AFTER INSERT ON users_user BEGIN '
+        'INSERT INTO users_user_search(rowid, username, email) VALUES (new.id, new.username, new.email); '
+        'END'
+    ),
+    'users_user_search_delete': (
+        'AFTER DELETE ON users_user BEGIN '
+        "INSERT INTO users_user_search(users_user_search, rowid, username, email) "
+        "VALUES ('delete', old.id, old.username, old.email); "
+        'END'
+    ),
+    'users_user_search_update': (
+        'AFTER UPDATE OF username, email ON users_user BEGIN '
+        "INSERT INTO users_user_search(users_user_search, rowid, username, email) "
+        "VALUES ('delete', old.id, old.username, old.email); "
+        'INSERT INTO users_user_search(rowid, username, email) VALUES (new.id, new.username, new.email); '
+        'END'
+    ),
+}
+
+
+def create_search_indexes(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for name, table, column in TRIGRAM_INDEXES:
+                # matches the UPPER(col::text) LIKE UPPER(%s) produced by icontains lookups
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" USING gin (UPPER("{column}"::text) gin_trgm_ops)'
+                )
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS users_user_search USING fts5("
+                "username, email, content='users_user', content_rowid='id', tokenize='trigram')"
+            )
+            ensure_search_triggers(connection)
+
+
+def ensure_search_triggers(connection):
+    """
+    SQLite drops triggers whenever a migration rebuilds users_user,
+    recreates them and rebuilds the shadow table if any of them was gone.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'users_user_search'")
+        if cursor.fetchone() is None:
+            return
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'users_user'")
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = [name for name in FTS5_TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(f'CREATE TRIGGER {name} {FTS5_TRIGGERS[name]}')
+        if missing:
+            cursor.execute("INSERT INTO users_user_search(users_user_search) VALUES ('rebuild')")
+
+
+def drop_search_indexes(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for name, table, column in TRIGRAM_INDEXES:
+                cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+        elif connection.vendor == 'sqlite':
+            for name in FTS5_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute('DROP TABLE IF EXISTS users_user_search')
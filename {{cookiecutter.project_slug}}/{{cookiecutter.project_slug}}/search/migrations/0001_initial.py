@@ -0,0 +1,21 @@
+from django.db import migrations
+
+from {{cookiecutter.project_slug}}.search.indexes import create_search_indexes, drop_search_indexes
+
+
+def forwards(apps, schema_editor):
+    create_search_indexes(schema_editor.connection)
+
+
+def backwards(apps, schema_editor):
+    drop_search_indexes(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('users', '__first__'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
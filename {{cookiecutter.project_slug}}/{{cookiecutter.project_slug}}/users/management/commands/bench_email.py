@@ -0,0 +1,46 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from {{cookiecutter.project_slug}}.utils.send_email import EmailBatcher, to_message
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares one SMTP connection per email with batched sending, against the configured EMAIL_HOST. '
+        'Run a local SMTP server, e.g. `python -m aiosmtpd -n -l localhost:8025`, and point EMAIL_HOST/EMAIL_PORT at it.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--emails', type=int, default=200)
+        parser.add_argument('--batch-size', type=int, default=50)
+
+    def handle(self, *args, **options):
+        emails = [
+            {
+                'subject': 'Verification URL',
+                'body': f'Verify your account: http://example.com/verify/{i}/',
+                'from_email': 'noreply@example.com',
+                'to': [f'user{i}@example.com'],
+                'html': f'<p>Verify your account: <a href="http://example.com/verify/{i}/">link</a></p>',
+            }
+            for i in range(options['emails'])
+        ]
+
+        start = time.perf_counter()
+        for data in emails:
+            to_message(data, get_connection()).send()
+        self.report('one connection per email', len(emails), time.perf_counter() - start)
+
+        batcher = EmailBatcher()
+        with override_settings(EMAIL_BATCH_SIZE=options['batch_size'], EMAIL_BATCH_MAX_DELAY_MS=60_000):
+            start = time.perf_counter()
+            for data in emails:
+                batcher.add(data)
+            batcher.flush()
+        self.report(f'batches of {options["batch_size"]}', len(emails), time.perf_counter() - start)
+
+    def report(self, name, emails, elapsed):
+        self.stdout.write(f'{name}: {emails / elapsed:,.0f} emails/sec')
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+
+from {{cookiecutter.project_slug}}.utils.email_templates import EMAIL_TEMPLATES
+
+
+class Command(BaseCommand):
+    help = 'Compares render_to_string + strip_tags with the precompiled email templates, in renders/sec.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--renders', type=int, default=5000)
+
+    def rate(self, func, renders):
+        start = time.perf_counter()
+        for i in range(renders):
+            func(i)
+        return renders / (time.perf_counter() - start)
+
+    def handle(self, *args, **options):
+        renders = options['renders']
+        for kind, template in EMAIL_TEMPLATES.items():
+            def context(i):
+                return {'receiver': f'user{i}@example.com', 'link': f'http://example.com/{kind}/{i}/?a=1&b=2',
+                        'message': 'Verification URL'}
+
+            def django_render(i):
+                html = render_to_string(template.template_name, context(i))
+                return html, strip_tags(html)
+
+            if template.render(**context(0))[0] != django_render(0)[0]:
+                raise CommandError(f'{kind}: the precompiled template renders differently from the template engine.')
+            django_rate = self.rate(django_render, renders)
+            compiled_rate = self.rate(lambda i: template.render(**context(i)), renders)
+            self.stdout.write(
+                f'{kind}: template engine {django_rate:,.0f} renders/sec, '
+                f'precompiled {compiled_rate:,.0f} renders/sec, {compiled_rate / django_rate:.1f}x'
+            )
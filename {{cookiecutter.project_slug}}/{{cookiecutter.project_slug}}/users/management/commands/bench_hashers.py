@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from {{cookiecutter.project_slug}}.utils.hashers import COST_ATTRIBUTES, HASHERS
+
+CANDIDATE_COSTS = {
+    'pbkdf2_sha256': (100_000, 200_000, 400_000, 600_000, 870_000, 1_200_000),
+    'argon2': (1, 2, 3, 4, 6, 8),
+    'bcrypt_sha256': (10, 11, 12, 13, 14),
+    'scrypt': (2 ** 13, 2 ** 14, 2 ** 15, 2 ** 16),
+}
+# memory-hard hashers first
+PREFERENCE = ('argon2', 'scrypt', 'bcrypt_sha256', 'pbkdf2_sha256')
+
+
+class Command(BaseCommand):
+    help = 'Measures hashes/sec per core for each password hasher and cost, and picks a cost for a latency budget.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget-ms', type=float, default=100, help='Target hashing time of one login.')
+        parser.add_argument('--rounds', type=int, default=3, help='Hashes measured per cost, the fastest counts.')
+        parser.add_argument('--algorithms', nargs='+', choices=list(HASHERS), default=list(HASHERS))
+
+    def latency(self, hasher, cost, rounds):
+        setattr(hasher, COST_ATTRIBUTES[hasher.algorithm], cost)
+        salt = hasher.salt()
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            hasher.encode('correct horse battery staple', salt)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def handle(self, *args, **options):
+        budget = options['budget_ms'] / 1000
+        best = {}
+        for algorithm in options['algorithms']:
+            hasher = HASHERS[algorithm]()
+            default_cost = getattr(hasher, COST_ATTRIBUTES[algorithm])
+            if getattr(hasher, 'library', None):
+                try:
+                    hasher._load_library()
+                except ValueError:
+                    self.stdout.write(f'{algorithm}: skipped, {hasher.library} is not installed')
+                    continue
+
+            for cost in CANDIDATE_COSTS[algorithm]:
+                seconds = self.latency(hasher, cost, options['rounds'])
+                self.stdout.write(f'{algorithm} cost={cost}: {seconds * 1000:.1f} ms, {1 / seconds:,.1f} hashes/sec/core')
+                if algorithm == 'pbkdf2_sha256':
+                    # pbkdf2 time is linear in iterations, so its cost can be fitted to the budget exactly
+                    best[algorithm] = max(10_000, int(budget / seconds * cost) // 10_000 * 10_000)
+                elif seconds <= budget:
+                    best[algorithm] = cost
+                if seconds > budget * 2:
+                    break
+
+            if algorithm in best:
+                note = f' (below the default of {default_cost})' if best[algorithm] < default_cost else ''
+                self.stdout.write(f'{algorithm}: cost {best[algorithm]} fits {options["budget_ms"]:g} ms{note}')
+            else:
+                self.stdout.write(f'{algorithm}: every cost is over {options["budget_ms"]:g} ms')
+
+        if not best:
+            raise CommandError('No hasher fits the budget.')
+        algorithm = next(algorithm for algorithm in PREFERENCE if algorithm in best)
+        self.stdout.write(self.style.SUCCESS(
+            f'Recommended: PASSWORD_HASHER={algorithm} PASSWORD_HASH_COST={best[algorithm]}'
+        ))
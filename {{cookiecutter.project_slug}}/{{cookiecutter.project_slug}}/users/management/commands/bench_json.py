@@ -0,0 +1,55 @@
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from {{cookiecutter.project_slug}}.users.models import User
+from {{cookiecutter.project_slug}}.users.serializers import UserSerializer
+from {{cookiecutter.project_slug}}.utils.paginators import NeatPagination
+from {{cookiecutter.project_slug}}.utils.parsers import ORJSONParser
+from {{cookiecutter.project_slug}}.utils.renderers import ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'Compares JSONRenderer/JSONParser with their orjson counterparts on a full NeatPagination page of users.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000)
+
+    def rate(self, func, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return iterations / (time.perf_counter() - start)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        paginator = NeatPagination()
+        request = Request(APIRequestFactory().get('/users/', {'limit': paginator.max_page_size}))
+        queryset = User.objects.select_related('profile').prefetch_related('groups', 'user_permissions')
+        page = paginator.paginate_queryset(queryset, request)
+        if not page:
+            raise CommandError('There are no users to render, create some first.')
+        serializer = UserSerializer(page, many=True, context={'request': request})
+        data = paginator.get_paginated_response(serializer.data).data
+
+        stdlib_body = JSONRenderer().render(data)
+        orjson_body = ORJSONRenderer().render(data)
+        if stdlib_body != orjson_body:
+            raise CommandError('ORJSONRenderer output differs from JSONRenderer output.')
+
+        self.stdout.write(f'page of {len(page)} users, {len(stdlib_body)} bytes, {iterations} iterations')
+        for name, stdlib, fast in (
+                ('render', lambda: JSONRenderer().render(data), lambda: ORJSONRenderer().render(data)),
+                ('parse', lambda: JSONParser().parse(BytesIO(stdlib_body)),
+                 lambda: ORJSONParser().parse(BytesIO(stdlib_body))),
+        ):
+            stdlib_rate = self.rate(stdlib, iterations)
+            fast_rate = self.rate(fast, iterations)
+            self.stdout.write(
+                f'{name}: stdlib {stdlib_rate:,.0f}/s, orjson {fast_rate:,.0f}/s, {fast_rate / stdlib_rate:.1f}x'
+            )
@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from {{cookiecutter.project_slug}}.users.models import User
+from {{cookiecutter.project_slug}}.users.serializers import MyTokenObtainPairSerializer
+from {{cookiecutter.project_slug}}.utils.tokens import outstanding_tokens
+
+PASSWORD = 'bench-logins-password'
+
+
+class TwoPairsTokenObtainPairSerializer(MyTokenObtainPairSerializer):
+    """The login path before tokens were issued once: the parent class signs a pair and then another one is signed."""
+
+    def validate(self, attrs):
+        data = TokenObtainPairSerializer.validate(self, attrs)
+        refresh = self.get_token(self.user)
+        data.update({'refresh': str(refresh), 'access': str(refresh.access_token)})
+        return data
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Measures logins/sec of the token obtain serializer. Everything it writes is rolled back.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=200)
+        parser.add_argument('--batch-size', type=int, default=100, help='OUTSTANDING_TOKENS_BATCH_SIZE to compare.')
+        parser.add_argument('--skip-hashing', action='store_true',
+                            help='Use a trivial password hasher to measure token issuing alone.')
+
+    def handle(self, *args, **options):
+        hashers = ['django.contrib.auth.hashers.MD5PasswordHasher'] if options['skip_hashing'] else None
+        try:
+            with transaction.atomic(), override_settings(**({'PASSWORD_HASHERS': hashers} if hashers else {})):
+                user = User.objects.create_user('bench_logins', 'bench_logins@example.com', PASSWORD)
+                User.objects.filter(pk=user.pk).update(is_active=True)
+                for name, serializer_class, batch_size in (
+                        ('two pairs per login', TwoPairsTokenObtainPairSerializer, 0),
+                        ('one pair per login', MyTokenObtainPairSerializer, 0),
+                        (f'one pair, batches of {options["batch_size"]}', MyTokenObtainPairSerializer,
+                         options['batch_size']),
+                ):
+                    with override_settings(OUTSTANDING_TOKENS_BATCH_SIZE=batch_size):
+                        self.run(name, serializer_class, user, options['logins'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, name, serializer_class, user, logins):
+        tokens = OutstandingToken.objects.count()
+        queries = []
+
+        def count_queries(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_queries):
+            start = time.perf_counter()
+            for _ in range(logins):
+                serializer = serializer_class(data={'email': user.email, 'password': PASSWORD})
+                serializer.is_valid(raise_exception=True)
+            outstanding_tokens.flush()
+            elapsed = time.perf_counter() - start
+        tokens = OutstandingToken.objects.count() - tokens
+        self.stdout.write(
+            f'{name}: {logins / elapsed:,.0f} logins/sec, {len(queries) / logins:.2f} queries '
+            f'and {tokens / logins:.2f} outstanding tokens per login'
+        )
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from {{cookiecutter.project_slug}}.users.services import delete_orphaned_avatars
+
+
+class Command(BaseCommand):
+    help = 'Deletes avatars and renditions in the bucket that no profile refers to anymore.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=int, default=int(settings.AVATAR_GC_GRACE.total_seconds() // 3600),
+                            help='Keep unreferenced objects younger than this, they may be pending uploads.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted.')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        def report(item):
+            if dry_run or options['verbosity'] > 1:
+                self.stdout.write(f"{item['Key']}\t{item['Size']}\t{item['LastModified']:%Y-%m-%d %H:%M}")
+
+        stats = delete_orphaned_avatars(grace=timedelta(hours=options['grace_hours']), dry_run=dry_run, report=report)
+        size = filesizeformat(stats['bytes'])
+        if dry_run:
+            self.stdout.write(f"{stats['orphaned']} orphaned objects, {size}, would be deleted")
+        else:
+            self.stdout.write(f"{stats['deleted']} orphaned objects deleted, {size}, {stats['failed']} failed, "
+                              f"{stats['kept']} kept as they were referenced again")
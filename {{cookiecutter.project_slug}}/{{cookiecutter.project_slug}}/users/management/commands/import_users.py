@@ -0,0 +1,139 @@
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import Lower
+
+from {{cookiecutter.project_slug}}.users.models import User, UserProfile
+from {{cookiecutter.project_slug}}.users.services import bulk_register
+from {{cookiecutter.project_slug}}.utils.cache import bump_version
+
+FIELDS = ('username', 'email', 'password')
+
+
+def read_rows(stream, file_format):
+    if file_format == 'csv':
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+
+def batches(rows, size):
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Imports users from a CSV or NDJSON file with username, email, password and an optional bio.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV/NDJSON file, or - for stdin.')
+        parser.add_argument('--format', choices=('csv', 'ndjson'), help='Defaults to the file extension.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Password hashing processes.')
+        parser.add_argument('--pre-hashed', action='store_true',
+                            help='The password column holds hashes such as pbkdf2_sha256$...')
+        parser.add_argument('--active', action='store_true', help='Mark imported users as active.')
+        parser.add_argument('--checkpoint', help='File recording imported rows, so an interrupted import can resume.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('csv' if path.endswith('.csv') else 'ndjson')
+        batch_size = options['batch_size']
+        checkpoint = options['checkpoint']
+        done = self.read_checkpoint(checkpoint, path)
+        if done:
+            self.stdout.write(f'resuming after {done} rows')
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        self.workers = options['workers']
+        executor = None if options['pre_hashed'] else ProcessPoolExecutor(self.workers, initializer=django.setup)
+        imported = skipped = 0
+        start = time.perf_counter()
+        try:
+            rows = islice(read_rows(stream, file_format), done, None)
+            for batch in batches(rows, batch_size):
+                for number, row in enumerate(batch, start=done + 1):
+                    if any(not row.get(field) for field in FIELDS):
+                        raise CommandError(f'row {number}: username, email and password are required.')
+                users, bios = self.build_users(batch, executor, options['active'])
+                if users:
+                    bulk_register(users=users, bios=bios)
+                done += len(batch)
+                imported += len(users)
+                skipped += len(batch) - len(users)
+                self.write_checkpoint(checkpoint, path, done)
+                rate = imported / (time.perf_counter() - start)
+                self.stdout.write(f'{done} rows processed, {imported} imported, {skipped} skipped, {rate:,.0f} rows/sec')
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            if stream is not sys.stdin:
+                stream.close()
+
+        if imported:
+            bump_version(User)
+            bump_version(UserProfile)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} users ({skipped} skipped) in {elapsed:.1f}s, {imported / elapsed:,.0f} rows/sec'
+        ))
+
+    def build_users(self, batch, executor, active):
+        """Drops rows whose username or email is taken, then builds User objects with hashed passwords."""
+        usernames = {row['username'].lower() for row in batch}
+        emails = {User.objects.normalize_email(row['email']).lower() for row in batch}
+        taken = User.objects.annotate(username_lower=Lower('username'), email_lower=Lower('email'))
+        taken_usernames = set(taken.filter(username_lower__in=usernames).values_list('username_lower', flat=True))
+        taken_emails = set(taken.filter(email_lower__in=emails).values_list('email_lower', flat=True))
+
+        rows = []
+        for row in batch:
+            email = User.objects.normalize_email(row['email'])
+            if row['username'].lower() in taken_usernames or email.lower() in taken_emails:
+                continue
+            taken_usernames.add(row['username'].lower())
+            taken_emails.add(email.lower())
+            rows.append({**row, 'email': email})
+
+        passwords = [row['password'] for row in rows]
+        if executor is None:
+            for password in passwords:
+                try:
+                    identify_hasher(password)
+                except ValueError:
+                    raise CommandError('--pre-hashed was given but a password is not a recognized hash.')
+        else:
+            chunksize = max(1, len(passwords) // (self.workers * 4))
+            passwords = list(executor.map(make_password, passwords, chunksize=chunksize))
+
+        users = [
+            User(username=row['username'], email=row['email'], password=password, is_active=active)
+            for row, password in zip(rows, passwords)
+        ]
+        return users, [row.get('bio') or None for row in rows]
+
+    def read_checkpoint(self, checkpoint, path):
+        if not checkpoint or not os.path.exists(checkpoint):
+            return 0
+        with open(checkpoint) as file:
+            state = json.load(file)
+        if state['path'] != path:
+            raise CommandError(f'{checkpoint} belongs to an import of {state["path"]}.')
+        return state['rows']
+
+    def write_checkpoint(self, checkpoint, path, rows):
+        if not checkpoint:
+            return
+        with open(f'{checkpoint}.tmp', 'w') as file:
+            json.dump({'path': path, 'rows': rows}, file)
+        os.replace(f'{checkpoint}.tmp', checkpoint)
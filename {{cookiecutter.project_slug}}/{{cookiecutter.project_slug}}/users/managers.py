@@ -1,4 +1,5 @@
 from django.contrib.auth.models import BaseUserManager
+from django.db.models.functions import Lower
 
 
 class UserManager(BaseUserManager):
@@ -13,6 +14,10 @@ class UserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
+    def get_by_email(self, email):
+        """Case-insensitive lookup backed by the unique index on Lower(email)."""
+        return self.alias(email_lower=Lower('email')).get(email_lower=email.lower())
+
     def create_superuser(self, username, email, password, bio=None, avatar=None):
         user = self.create_user(username, email, password)
         user.is_admin = True
@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
 from django.core.validators import FileExtensionValidator
 from django.db import models
+from django.db.models.functions import Lower
 
 from .managers import UserManager
 
@@ -10,6 +11,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(unique=True)
     is_active = models.BooleanField(default=False)
     is_admin = models.BooleanField(default=False)
+    modified = models.DateTimeField(auto_now=True)
 
     objects = UserManager()
 
@@ -25,6 +27,10 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     class Meta:
         ordering = ('email',)
+        constraints = [
+            models.UniqueConstraint(Lower('username'), name='unique_user_username_ci'),
+            models.UniqueConstraint(Lower('email'), name='unique_user_email_ci'),
+        ]
 
 
 class UserProfile(models.Model):
@@ -35,7 +41,11 @@ class UserProfile(models.Model):
         null=True,
         validators=[FileExtensionValidator(['png', 'jpg', 'jpeg'])]
     )
+    # sha256 of the avatar the renditions were made from, and the name of that avatar
+    avatar_hash = models.CharField(max_length=64, blank=True, default='')
+    avatar_source = models.CharField(max_length=255, blank=True, default='')
     bio = models.TextField(max_length=500, blank=True, null=True)
+    modified = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'{self.owner}'
@@ -1,11 +1,28 @@
 from django.contrib.auth.password_validation import validate_password
+from django.conf import settings
+from django.contrib.auth.models import update_last_login
+from django.utils import timezone
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenObtainSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from {{cookiecutter.project_slug}}.utils.bucket import Bucket
+from {{cookiecutter.project_slug}}.utils.images import HEADER_SIZE, image_content_type
+from {{cookiecutter.project_slug}}.utils.integrity import unique_field_errors
+from {{cookiecutter.project_slug}}.utils.tokens import RefreshToken
+from {{cookiecutter.project_slug}}.utils.upload_handlers import S3UploadedFile
 from .models import User
+from .services import avatar_key_prefix, avatar_renditions, register
+
+UNIQUE_ERRORS = {
+    'username': 'user with this username already exists.',
+    'email': 'user with this email already exists.',
+}
 
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RefreshToken
+
     @classmethod
     def get_token(cls, user, lifetime=None):
         token = super().get_token(user)
@@ -14,8 +31,11 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         return token
 
     def validate(self, attrs):
-        data = super().validate(attrs)
+        # TokenObtainPairSerializer.validate would issue a token pair of its own, so only authenticate here
+        data = TokenObtainSerializer.validate(self, attrs)
         refresh = self.get_token(self.user)
+        if api_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, self.user)
         data.update({
             'refresh': str(refresh),
             'access': str(refresh.access_token),
@@ -28,9 +48,25 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         return data
 
 
+class MyTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RefreshToken
+
+
+class AvatarField(serializers.ImageField):
+    def to_internal_value(self, data):
+        # checked by S3MultipartImageUploadHandler while it was streamed, reading it back would download it
+        if isinstance(data, S3UploadedFile):
+            return data
+        return super().to_internal_value(data)
+
+
 class UserSerializer(serializers.ModelSerializer):
     bio = serializers.CharField(source='profile.bio', required=False)
-    avatar = serializers.ImageField(source='profile.avatar', required=False)
+    avatar = AvatarField(source='profile.avatar', required=False)
+    avatar_renditions = serializers.SerializerMethodField()
+
+    select_related_fields = ('profile',)
+    prefetch_related_fields = ('groups', 'user_permissions')
 
     class Meta:
         model = User
@@ -41,24 +77,42 @@ class UserSerializer(serializers.ModelSerializer):
             'is_admin',
             'groups',
             'user_permissions',
-            'is_active'
+            'is_active',
+            'modified'
         )
+        # uniqueness is enforced by the database constraints on save
+        extra_kwargs = {
+            'username': {'validators': []},
+            'email': {'validators': []},
+        }
+
+    def get_avatar_renditions(self, user) -> dict:
+        profile = getattr(user, 'profile', None)
+        if profile is None:
+            return {}
+        return {
+            size: {extension: profile.avatar.storage.url(key) for extension, key in keys.items()}
+            for size, keys in avatar_renditions(profile).items()
+        }
 
     def update(self, instance, validated_data):
         # fetching objects data
         profile_data = validated_data.pop('profile', {})
         user_data = validated_data
 
-        # saving user profile info
-        profile = instance.profile
-        profile.bio = profile_data.get('bio', profile.bio)
-        profile.avatar = profile_data.get('avatar', profile.avatar)
-        profile.save()
+        with unique_field_errors(User, UNIQUE_ERRORS):
+            # saving user profile info
+            profile = instance.profile
+            profile.bio = profile_data.get('bio', profile.bio)
+            avatar = profile_data.get('avatar', profile.avatar)
+            # a streamed avatar is in the bucket already, only its key is saved
+            profile.avatar = avatar.key if isinstance(avatar, S3UploadedFile) else avatar
+            profile.save()
 
-        # saving user info
-        instance.username = user_data.get('username', instance.username)
-        instance.email = user_data.get('email', instance.email)
-        instance.save()
+            # saving user info
+            instance.username = user_data.get('username', instance.username)
+            instance.email = user_data.get('email', instance.email)
+            instance.save()
 
         return instance
 
@@ -67,18 +121,6 @@ class UserSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('fields can not be blank.')
         return attrs
 
-    def validate_username(self, username):
-        users = User.objects.filter(username__exact=username)
-        if users.exists():
-            raise serializers.ValidationError('user with this username already exists.')
-        return username
-
-    def validate_email(self, email):
-        users = User.objects.filter(email__exact=email)
-        if users.exists():
-            raise serializers.ValidationError('user with this Email already exists.')
-        return email
-
 
 class UserRegisterSerializer(serializers.ModelSerializer):
     password2 = serializers.CharField(required=True, write_only=True, min_length=8)
@@ -86,10 +128,21 @@ class UserRegisterSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('username', 'email', 'password', 'password2')
+        # uniqueness is enforced by the database constraints on save
         extra_kwargs = {
             'password': {'write_only': True, 'min_length': 8},
+            'username': {'validators': []},
+            'email': {'validators': []},
         }
 
+    def create(self, validated_data):
+        with unique_field_errors(User, UNIQUE_ERRORS):
+            return register(
+                username=validated_data['username'],
+                email=validated_data['email'],
+                password=validated_data['password']
+            )
+
     def validate(self, data):
         password1 = data.get('password')
         password2 = data.get('password2')
@@ -108,7 +161,7 @@ class ResendVerificationEmailSerializer(serializers.Serializer):
     def validate(self, attrs):
         email = attrs.get('email')
         try:
-            user = User.objects.get(email=email)
+            user = User.objects.get_by_email(email)
         except User.DoesNotExist:
             raise serializers.ValidationError('User does not exist!')
         if user.is_active:
@@ -162,3 +215,34 @@ class ResetPasswordSerializer(serializers.Serializer):
 
 class TokenSerializer(serializers.Serializer):
     refresh = serializers.CharField(required=True, write_only=True)
+
+
+class AvatarUploadSerializer(serializers.Serializer):
+    content_type = serializers.ChoiceField(choices=list(settings.AVATAR_CONTENT_TYPES))
+
+
+class AvatarUploadResponseSerializer(serializers.Serializer):
+    url = serializers.URLField()
+    fields = serializers.DictField(child=serializers.CharField())
+    key = serializers.CharField()
+
+
+class AvatarConfirmSerializer(serializers.Serializer):
+    key = serializers.CharField()
+
+    def validate_key(self, key):
+        user: User = self.context['user']
+        if not key.startswith(avatar_key_prefix(user)) or '..' in key:
+            raise serializers.ValidationError('This is not an upload of yours.')
+        head = Bucket().head_object(key)
+        if head is None:
+            raise serializers.ValidationError('The file has not been uploaded.')
+        # older uploads may already be collected as orphans, see gc_avatars
+        if head['LastModified'] < timezone.now() - settings.AVATAR_GC_GRACE:
+            raise serializers.ValidationError('The upload has expired, upload the file again.')
+        if head['ContentType'] not in settings.AVATAR_CONTENT_TYPES or head['ContentLength'] > settings.AVATAR_MAX_SIZE:
+            raise serializers.ValidationError('The file is not a valid avatar.')
+        # the presigned POST only bounds the declared content type, the content is checked here
+        if image_content_type(Bucket().get_object(key, length=HEADER_SIZE)) != head['ContentType']:
+            raise serializers.ValidationError('The file is not a valid avatar.')
+        return key
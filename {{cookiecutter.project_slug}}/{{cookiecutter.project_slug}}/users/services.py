@@ -1,5 +1,22 @@
-from .models import User, UserProfile
+import logging
+import time
+from datetime import timedelta
+from hashlib import sha256
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+from {{cookiecutter.project_slug}}.utils.authentication import user_cache
+from {{cookiecutter.project_slug}}.utils.bucket import DELETE_BATCH_SIZE, Bucket, delete_objects_async
+from {{cookiecutter.project_slug}}.utils.cache import bump_version
+from {{cookiecutter.project_slug}}.utils.images import RENDITION_FORMATS, render_renditions, rendition_key
+from .models import User, UserProfile
+
+logger = logging.getLogger(__name__)
 
 
 def create_user(*, username: str, email: str, password) -> User:
@@ -15,3 +32,174 @@ def register(*, username: str, email: str, password: str) -> User:
     user = create_user(username=username, email=email, password=password)
     create_user_profile(user=user)
     return user
+
+
+@transaction.atomic
+def bulk_register(*, users: list[User], bios: list = None) -> list[User]:
+    """Inserts users whose password is already hashed, and their profiles, in two statements."""
+    User.objects.bulk_create(users)
+    bios = bios or [None] * len(users)
+    UserProfile.objects.bulk_create([UserProfile(owner=user, bio=bio) for user, bio in zip(users, bios)])
+    return users
+
+
+def activation_replay_key(jti: str) -> str:
+    return f'activation_jti:{jti}'
+
+
+def activate(*, payload: dict):
+    """
+    Activates the user of a decoded activation token with a single conditional UPDATE.
+    Returns True when activated, False when the account is already active and None when the token matches no user.
+    Consumed token ids are remembered until the token expires, so repeated clicks skip the database.
+    Without the cache every click runs the UPDATE, which is idempotent.
+    """
+    jti = payload.get('jti')
+    try:
+        if jti and cache.get(activation_replay_key(jti)):
+            return False
+    except Exception:
+        logger.warning('activation replay cache is unavailable')
+
+    # update() skips save(), so auto_now and the post_save cache invalidation are done here
+    activated = User.objects.filter(id=payload['user_id'], email=payload.get('email'), is_active=False).update(
+        is_active=True, modified=timezone.now()
+    )
+    if activated:
+        bump_version(User)
+        user_cache.invalidate(payload['user_id'])
+    elif not User.objects.filter(id=payload['user_id'], email=payload.get('email')).exists():
+        return None
+
+    if jti:
+        try:
+            cache.set(activation_replay_key(jti), True, timeout=max(1, int(payload['exp'] - time.time())))
+        except Exception:
+            logger.warning('activation replay cache is unavailable')
+    return bool(activated)
+
+
+def avatar_key_prefix(user: User) -> str:
+    return f'{UserProfile.avatar.field.upload_to}/{user.id}/'
+
+
+def new_avatar_key(*, user: User, content_type: str) -> str:
+    return f'{avatar_key_prefix(user)}{uuid4().hex}.{settings.AVATAR_CONTENT_TYPES[content_type]}'
+
+
+def attach_avatar(*, profile: UserProfile, key: str) -> UserProfile:
+    """Points the profile to an uploaded avatar and deletes the one it replaces."""
+    old = profile.avatar.name
+    profile.avatar.name = key
+    profile.save(update_fields=['avatar', 'modified'])
+    if old and old != key:
+        delete_objects_async([old])
+    return profile
+
+
+def avatar_renditions(profile: UserProfile) -> dict:
+    """Keys of the renditions of the current avatar by size and extension, empty until they are made."""
+    if not profile.avatar or not profile.avatar_hash or profile.avatar_source != profile.avatar.name:
+        return {}
+    prefix = UserProfile.avatar.field.upload_to
+    return {
+        size: {extension: rendition_key(prefix, profile.avatar_hash, size, extension) for extension in RENDITION_FORMATS}
+        for size in settings.AVATAR_RENDITION_SIZES
+    }
+
+
+def create_avatar_renditions(*, profile_id: int) -> bool:
+    """
+    Stores the renditions of a profile's avatar, returns whether any were encoded.
+    Nothing is encoded when the avatar has the hash of the one the renditions were made from, or is not an image.
+    """
+    profile = UserProfile.objects.filter(id=profile_id).first()
+    if profile is None or not profile.avatar:
+        return False
+    source = profile.avatar.name
+    data = Bucket().get_object(source)
+    digest = sha256(data).hexdigest()
+
+    encoded = digest != profile.avatar_hash
+    if encoded:
+        prefix = UserProfile.avatar.field.upload_to
+        try:
+            for size, extension, body, content_type in render_renditions(data, settings.AVATAR_RENDITION_SIZES):
+                Bucket().put_object(rendition_key(prefix, digest, size, extension), body, content_type)
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError):
+            # retrying won't make it an image
+            logger.warning('could not make renditions of %s, it is not a usable image', source)
+            return False
+
+    # the avatar may have been replaced while this one was encoded
+    updated = UserProfile.objects.filter(id=profile_id, avatar=source).update(
+        avatar_hash=digest, avatar_source=source, modified=timezone.now()
+    )
+    if updated:
+        bump_version(UserProfile)
+        user_cache.invalidate(profile.owner_id)
+    return encoded
+
+
+def rendition_digest(key: str):
+    """The avatar hash a rendition key was made from, None for keys of avatars."""
+    renditions = f'{UserProfile.avatar.field.upload_to}/renditions/'
+    if key.startswith(renditions):
+        return key[len(renditions):].split('/', 1)[0]
+    return None
+
+
+def referenced_avatars(keys) -> set:
+    """The ones of `keys` some profile refers to right now, as its avatar or a rendition of it."""
+    digests = {rendition_digest(key) for key in keys} - {None}
+    avatars = set(UserProfile.objects.filter(avatar__in=keys).values_list('avatar', flat=True))
+    hashes = set(UserProfile.objects.filter(avatar_hash__in=digests).values_list('avatar_hash', flat=True))
+    return {key for key in keys if key in avatars or rendition_digest(key) in hashes}
+
+
+def orphaned_avatars(*, grace: timedelta):
+    """Yields the objects under the avatars prefix no profile refers to, last modified more than `grace` ago."""
+    prefix = UserProfile.avatar.field.upload_to
+    avatars, hashes = set(), set()
+    for avatar, digest in UserProfile.objects.exclude(avatar='').values_list('avatar', 'avatar_hash').iterator():
+        avatars.add(avatar)
+        hashes.add(digest)
+
+    cutoff = timezone.now() - grace
+    for item in Bucket().iter_objects(f'{prefix}/'):
+        key = item['Key']
+        digest = rendition_digest(key)
+        referenced = key in avatars if digest is None else digest in hashes
+        if not referenced and item['LastModified'] < cutoff:
+            yield item
+
+
+def delete_orphaned_avatars(*, grace: timedelta, dry_run: bool = False, report=None) -> dict:
+    """
+    Deletes orphaned avatars in batches, `report` is called with each one. Returns counts of what was found.
+    Each batch is checked against the profiles again, one may have been set as an avatar since they were read.
+    """
+    stats = {'orphaned': 0, 'bytes': 0, 'deleted': 0, 'failed': 0, 'kept': 0}
+    batch = []
+
+    def delete():
+        kept = referenced_avatars(batch)
+        keys = [key for key in batch if key not in kept]
+        failed = len(Bucket().delete_objects(keys))
+        stats['deleted'] += len(keys) - failed
+        stats['kept'] += len(kept)
+        stats['failed'] += failed
+        batch.clear()
+
+    for item in orphaned_avatars(grace=grace):
+        stats['orphaned'] += 1
+        stats['bytes'] += item['Size']
+        if report is not None:
+            report(item)
+        if not dry_run:
+            batch.append(item['Key'])
+            if len(batch) == DELETE_BATCH_SIZE:
+                delete()
+    if batch:
+        delete()
+    return stats
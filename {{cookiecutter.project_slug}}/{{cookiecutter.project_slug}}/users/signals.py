@@ -0,0 +1,40 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from {{cookiecutter.project_slug}}.utils.authentication import user_cache
+from {{cookiecutter.project_slug}}.utils.cache import bump_version
+from .models import User, UserProfile
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def bump_cache_version(sender, **kwargs):
+    bump_version(sender)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def bump_user_cache_version(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    # keeps the profile validators in sync with the serialized groups and permissions
+    users = User.objects.filter(pk__in=pk_set or ()) if reverse else User.objects.filter(pk=instance.pk)
+    users.update(modified=timezone.now())
+    bump_version(User)
+    user_cache.invalidate(*(pk_set or ()) if reverse else (instance.pk,))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # covers password changes and deactivation, which both save the user
+    user_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_cached_profile_owner(sender, instance, **kwargs):
+    user_cache.invalidate(instance.owner_id)
@@ -1,11 +1,17 @@
 from datetime import timedelta
 
+from botocore.exceptions import BotoCoreError, ClientError
 from celery import shared_task
+from celery.signals import worker_process_init, worker_process_shutdown
 from django.conf import settings
 from django.urls import reverse
 
 from .models import User
+from .services import create_avatar_renditions, delete_orphaned_avatars
 from {{cookiecutter.project_slug}}.utils import JWT_token, send_email
+from {{cookiecutter.project_slug}}.utils.blacklist import DatabaseBlacklistStore
+from {{cookiecutter.project_slug}}.utils.bucket import Bucket
+from {{cookiecutter.project_slug}}.utils.email_templates import EMAIL_TEMPLATES
 
 
 @shared_task
@@ -15,4 +21,46 @@ def send_verification_email(email_address: str, user_id: int, action: str, messa
     url = f"http://{settings.DOMAIN}{reverse('users:user-register-verify', args=[token])}"
     if action == 'reset_password':
         url = f"http://{settings.DOMAIN}{reverse('users:set-password', args=[token])}"
-    send_email.send_link(email_address, url, message)
+    send_email.email_batcher.add(send_email.build_email(action, email_address, url, message))
+
+
+@shared_task
+def deliver_email(data: dict, attempt: int = 0):
+    """Sends an email built by send_email, through the worker's batch."""
+    send_email.email_batcher.add(data, attempt)
+
+
+@worker_process_init.connect
+def compile_email_templates(**kwargs):
+    for template in EMAIL_TEMPLATES.values():
+        template.compile()
+
+
+@worker_process_shutdown.connect
+def flush_emails(**kwargs):
+    send_email.email_batcher.flush()
+
+
+@shared_task
+def record_blacklisted_token(user_id: int, jti: str, token: str, exp: int):
+    """Writes a token blacklisted in the cache to the SQL tables, for auditing."""
+    DatabaseBlacklistStore().add(user_id, jti, token, exp)
+
+
+@shared_task(bind=True, autoretry_for=(BotoCoreError, ClientError), retry_backoff=True, max_retries=5)
+def delete_bucket_objects(self, keys: list):
+    """Deletes objects from the bucket, retrying the keys S3 could not delete."""
+    failed = Bucket().delete_objects(keys)
+    if failed:
+        raise self.retry(args=(failed,))
+
+
+@shared_task(autoretry_for=(BotoCoreError, ClientError), retry_backoff=True, max_retries=5)
+def make_avatar_renditions(profile_id: int):
+    create_avatar_renditions(profile_id=profile_id)
+
+
+@shared_task
+def gc_avatars():
+    """Deletes avatars no profile refers to anymore, run daily by celery beat."""
+    return delete_orphaned_avatars(grace=settings.AVATAR_GC_GRACE)
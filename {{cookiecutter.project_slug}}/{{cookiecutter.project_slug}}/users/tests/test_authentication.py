@@ -0,0 +1,90 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import override_settings
+from model_bakery import baker
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from {{cookiecutter.project_slug}}.users.models import User, UserProfile
+from {{cookiecutter.project_slug}}.utils.authentication import CachedJWTAuthentication, user_cache
+
+
+class TestCachedJWTAuthentication(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.local.clear()
+        self.user = baker.make(User, is_active=True)
+        baker.make(UserProfile, owner=self.user, bio='bio')
+        self.factory = APIRequestFactory()
+
+    def authenticate(self, user=None):
+        token = str(AccessToken.for_user(user or self.user))
+        request = self.factory.get('/', HTTP_AUTHORIZATION='Bearer ' + token)
+        return CachedJWTAuthentication().authenticate(request)[0]
+
+    def test_user_is_cached(self):
+        with self.assertNumQueries(3):
+            self.authenticate()
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertEqual(user, self.user)
+        self.assertEqual(user.profile.bio, 'bio')
+
+    def test_cached_user_is_a_copy(self):
+        self.authenticate().username = 'changed'
+        self.assertEqual(self.authenticate().username, self.user.username)
+
+    @skipUnless(settings.AUTH_USER_CACHE['timeout'], 'users are only cached per process')
+    def test_shared_cache(self):
+        self.authenticate()
+        user_cache.local.clear()
+        with self.assertNumQueries(0):
+            self.authenticate()
+
+    def test_invalidated_on_deactivation(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_invalidated_on_password_change(self):
+        self.authenticate()
+        self.user.set_password('asdF@1234')
+        self.user.save()
+        self.assertTrue(self.authenticate().check_password('asdF@1234'))
+
+    def test_invalidated_on_profile_save(self):
+        self.authenticate()
+        self.user.profile.bio = 'new bio'
+        self.user.profile.save()
+        self.assertEqual(self.authenticate().profile.bio, 'new bio')
+
+    def test_invalidated_on_groups_change(self):
+        self.authenticate()
+        self.user.groups.add(baker.make('auth.Group'))
+        self.assertEqual(self.authenticate().groups.count(), 1)
+
+    def test_deleted_user(self):
+        token = str(AccessToken.for_user(self.user))
+        request = self.factory.get('/', HTTP_AUTHORIZATION='Bearer ' + token)
+        CachedJWTAuthentication().authenticate(request)
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            CachedJWTAuthentication().authenticate(request)
+
+    @override_settings(AUTH_USER_CACHE={'maxsize': 1, 'local_timeout': 5, 'timeout': 0})
+    def test_local_cache_size(self):
+        other = baker.make(User, is_active=True)
+        self.authenticate()
+        self.authenticate(other)
+        self.assertEqual(list(user_cache.local), [other.id])
+
+    @override_settings(AUTH_USER_CACHE={'maxsize': 10, 'local_timeout': 0, 'timeout': 0})
+    def test_local_timeout(self):
+        self.authenticate()
+        with self.assertNumQueries(3):
+            self.authenticate()
@@ -0,0 +1,114 @@
+from io import BytesIO
+from unittest.mock import patch
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from model_bakery import baker
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from {{cookiecutter.project_slug}}.users.models import User, UserProfile
+from {{cookiecutter.project_slug}}.users.serializers import UserSerializer
+from {{cookiecutter.project_slug}}.users.services import create_avatar_renditions
+from {{cookiecutter.project_slug}}.users.tasks import make_avatar_renditions
+from {{cookiecutter.project_slug}}.utils.bucket import Bucket
+from .test_bucket import BucketTestCase
+
+
+def image(mode='RGB', size=(300, 200)) -> bytes:
+    output = BytesIO()
+    Image.new(mode, size, 'red').save(output, 'PNG')
+    return output.getvalue()
+
+
+class TestAvatarRenditions(BucketTestCase, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = baker.make(User, is_active=True)
+        self.profile = baker.make(UserProfile, owner=self.user, avatar='avatars/1/a.png')
+        self.put('avatars/1/a.png')
+        self.puts = []
+        Bucket().connection.meta.events.register('before-call.s3.PutObject', lambda **kwargs: self.puts.append(1))
+
+    def put(self, key, body=None):
+        self.s3.put_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key, Body=body or image())
+
+    def renditions(self):
+        return {key for key in self.keys() if '/renditions/' in key}
+
+    def test_create_renditions(self):
+        self.assertTrue(create_avatar_renditions(profile_id=self.profile.id))
+        self.profile.refresh_from_db()
+        self.assertEqual(len(self.profile.avatar_hash), 64)
+        self.assertEqual(self.profile.avatar_source, 'avatars/1/a.png')
+        self.assertEqual(len(self.renditions()), len(settings.AVATAR_RENDITION_SIZES) * 2)
+
+        key = f'avatars/renditions/{self.profile.avatar_hash}/64.webp'
+        with Image.open(BytesIO(Bucket().get_object(key))) as rendition:
+            self.assertEqual((rendition.format, rendition.size), ('WEBP', (64, 64)))
+        head = Bucket().head_object(key.replace('.webp', '.jpg'))
+        self.assertEqual(head['ContentType'], 'image/jpeg')
+
+    def test_transparent_source(self):
+        self.put('avatars/1/a.png', image('RGBA'))
+        self.assertTrue(make_avatar_renditions.apply((self.profile.id,)).successful())
+        self.assertEqual(len(self.renditions()), len(settings.AVATAR_RENDITION_SIZES) * 2)
+
+    def test_not_an_image(self):
+        self.put('avatars/1/a.png', b'<?php echo "not an image"; ?>')
+        with self.assertLogs('{{cookiecutter.project_slug}}.users.services'):
+            self.assertFalse(create_avatar_renditions(profile_id=self.profile.id))
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.avatar_hash, '')
+        self.assertEqual(self.renditions(), set())
+
+    def test_truncated_image(self):
+        self.put('avatars/1/a.png', image()[:100])
+        with self.assertLogs('{{cookiecutter.project_slug}}.users.services'):
+            self.assertTrue(make_avatar_renditions.apply((self.profile.id,)).successful())
+        self.assertEqual(self.renditions(), set())
+
+    def test_decompression_bomb(self):
+        with patch.object(Image, 'MAX_IMAGE_PIXELS', 1000), \
+                self.assertLogs('{{cookiecutter.project_slug}}.users.services'):
+            self.assertTrue(make_avatar_renditions.apply((self.profile.id,)).successful())
+        self.assertEqual(self.renditions(), set())
+
+    def test_retried_on_s3_errors(self):
+        error = ClientError({'Error': {'Code': 'SlowDown'}}, 'GetObject')
+        with patch.object(Bucket, 'get_object', side_effect=[error, image()]):
+            self.assertTrue(make_avatar_renditions.apply((self.profile.id,)).successful())
+        self.assertEqual(len(self.renditions()), len(settings.AVATAR_RENDITION_SIZES) * 2)
+
+    def test_unchanged_source_is_not_encoded(self):
+        create_avatar_renditions(profile_id=self.profile.id)
+        self.puts.clear()
+        self.assertFalse(create_avatar_renditions(profile_id=self.profile.id))
+
+        # the same image uploaded again under a new key
+        self.put('avatars/1/b.png')
+        UserProfile.objects.filter(id=self.profile.id).update(avatar='avatars/1/b.png')
+        self.assertFalse(create_avatar_renditions(profile_id=self.profile.id))
+        self.assertEqual(self.puts, [])
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.avatar_source, 'avatars/1/b.png')
+
+    def test_changed_source_is_encoded(self):
+        create_avatar_renditions(profile_id=self.profile.id)
+        self.put('avatars/1/a.png', image(size=(50, 80)))
+        self.assertTrue(create_avatar_renditions(profile_id=self.profile.id))
+        self.assertEqual(len(self.renditions()), len(settings.AVATAR_RENDITION_SIZES) * 4)
+
+    def test_serializer_urls(self):
+        self.assertEqual(UserSerializer(self.user).data['avatar_renditions'], {})
+        create_avatar_renditions(profile_id=self.profile.id)
+        self.user.refresh_from_db()
+        renditions = UserSerializer(self.user).data['avatar_renditions']
+        self.assertEqual(set(renditions), set(settings.AVATAR_RENDITION_SIZES))
+        self.assertIn(f'renditions/{self.user.profile.avatar_hash}/256.webp', renditions[256]['webp'])
+
+    def test_renditions_of_replaced_avatar_are_hidden(self):
+        create_avatar_renditions(profile_id=self.profile.id)
+        UserProfile.objects.filter(id=self.profile.id).update(avatar='avatars/1/new.png')
+        self.user.refresh_from_db()
+        self.assertEqual(UserSerializer(self.user).data['avatar_renditions'], {})
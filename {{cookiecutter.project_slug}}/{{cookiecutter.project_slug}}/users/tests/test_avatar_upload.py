@@ -0,0 +1,117 @@
+import os
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+from model_bakery import baker
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from {{cookiecutter.project_slug}}.users.models import User, UserProfile
+from .test_bucket import BucketTestCase
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_data/images/test.png'), 'rb') as image:
+    PNG = image.read()
+
+
+class TestAvatarUpload(BucketTestCase, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = baker.make(User, is_active=True)
+        self.profile = baker.make(UserProfile, owner=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(AccessToken.for_user(self.user)))
+
+    def upload(self, content_type='image/png', body=PNG):
+        response = self.client.post(reverse('users:avatar-upload'), {'content_type': content_type})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # what the client does with the presigned POST, straight to the bucket
+        self.s3.put_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=response.data['key'], Body=body,
+                           ContentType=response.data['fields']['Content-Type'])
+        return response
+
+    def confirm(self, key):
+        return self.client.post(reverse('users:avatar-confirm'), {'key': key})
+
+    def test_presigned_post(self):
+        response = self.client.post(reverse('users:avatar-upload'), {'content_type': 'image/jpeg'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(response.data['key'].startswith(f'avatars/{self.user.id}/'))
+        self.assertTrue(response.data['key'].endswith('.jpg'))
+        self.assertEqual(response.data['fields']['key'], response.data['key'])
+        self.assertIn('policy', response.data['fields'])
+        self.assertIn(settings.AWS_STORAGE_BUCKET_NAME, response.data['url'])
+
+    def test_unsupported_content_type(self):
+        response = self.client.post(reverse('users:avatar-upload'), {'content_type': 'image/gif'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('content_type', response.data['errors'])
+
+    def test_anonymous(self):
+        self.client.credentials()
+        response = self.client.post(reverse('users:avatar-upload'), {'content_type': 'image/png'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @patch('{{cookiecutter.project_slug}}.users.views.make_avatar_renditions.delay_on_commit')
+    @patch('{{cookiecutter.project_slug}}.users.tasks.delete_bucket_objects.delay_on_commit')
+    def test_confirm(self, mock_delete, mock_renditions):
+        key = self.upload().data['key']
+        response = self.confirm(key)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.avatar.name, key)
+        mock_delete.assert_not_called()
+        mock_renditions.assert_called_once_with(self.profile.id)
+
+    @patch('{{cookiecutter.project_slug}}.users.tasks.delete_bucket_objects.delay_on_commit')
+    def test_confirm_replaces_old_avatar(self, mock_delete):
+        UserProfile.objects.filter(id=self.profile.id).update(avatar='avatars/old.png')
+        key = self.upload().data['key']
+        self.assertEqual(self.confirm(key).status_code, status.HTTP_200_OK)
+        mock_delete.assert_called_once_with(['avatars/old.png'])
+
+    def test_confirm_missing_upload(self):
+        response = self.confirm(f'avatars/{self.user.id}/missing.png')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors']['key'][0], 'The file has not been uploaded.')
+
+    def test_confirm_someone_elses_upload(self):
+        other = baker.make(User, is_active=True)
+        self.s3.put_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=f'avatars/{other.id}/a.png', Body=b'x',
+                           ContentType='image/png')
+        response = self.confirm(f'avatars/{other.id}/a.png')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors']['key'][0], 'This is not an upload of yours.')
+        self.profile.refresh_from_db()
+        self.assertFalse(self.profile.avatar)
+
+    def test_confirm_too_large(self):
+        key = self.upload().data['key']
+        with self.settings(AVATAR_MAX_SIZE=4):
+            response = self.confirm(key)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors']['key'][0], 'The file is not a valid avatar.')
+
+    def test_confirm_not_an_image(self):
+        key = self.upload(body=b'<?php echo "not an image"; ?>').data['key']
+        response = self.confirm(key)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors']['key'][0], 'The file is not a valid avatar.')
+        self.profile.refresh_from_db()
+        self.assertFalse(self.profile.avatar)
+
+    def test_confirm_mismatched_content_type(self):
+        key = self.upload(content_type='image/jpeg').data['key']
+        response = self.confirm(key)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors']['key'][0], 'The file is not a valid avatar.')
+
+    def test_confirm_expired_upload(self):
+        key = self.upload().data['key']
+        later = timezone.now() + settings.AVATAR_GC_GRACE + timedelta(minutes=1)
+        with patch('{{cookiecutter.project_slug}}.users.serializers.timezone.now', return_value=later):
+            response = self.confirm(key)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors']['key'][0], 'The upload has expired, upload the file again.')
@@ -0,0 +1,62 @@
+import boto3
+from django.conf import settings
+from django.test import override_settings
+from moto import mock_aws
+from rest_framework.test import APISimpleTestCase
+
+from {{cookiecutter.project_slug}}.users.tasks import delete_bucket_objects
+from {{cookiecutter.project_slug}}.utils.bucket import Bucket
+
+
+@override_settings(AWS_S3_ENDPOINT_URL=None, AWS_SERVICE_NAME='s3', AWS_STORAGE_BUCKET_NAME='avatars-test')
+class BucketTestCase(APISimpleTestCase):
+    """Runs against moto's in-memory S3, with a fresh Bucket client."""
+
+    def setUp(self):
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+        Bucket._instance = None
+        self.addCleanup(setattr, Bucket, '_instance', None)
+        self.s3 = boto3.client('s3', region_name='us-east-1')
+        self.s3.create_bucket(Bucket=settings.AWS_STORAGE_BUCKET_NAME)
+
+    def put(self, *keys):
+        for key in keys:
+            self.s3.put_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key, Body=b'avatar')
+
+    def keys(self):
+        pages = self.s3.get_paginator('list_objects_v2').paginate(Bucket=settings.AWS_STORAGE_BUCKET_NAME)
+        return {item['Key'] for page in pages for item in page.get('Contents', [])}
+
+
+class TestBucket(BucketTestCase):
+    def test_client_config(self):
+        config = Bucket().connection.meta.config
+        self.assertEqual(config.max_pool_connections, settings.AWS_S3_CLIENT_CONFIG.max_pool_connections)
+        self.assertTrue(config.tcp_keepalive)
+
+    def test_delete_object(self):
+        self.put('avatars/a.png', 'avatars/b.png')
+        self.assertTrue(Bucket().delete_object('avatars/a.png'))
+        self.assertEqual(self.keys(), {'avatars/b.png'})
+
+    def test_get_object_range(self):
+        self.put('avatars/a.png')
+        self.assertEqual(Bucket().get_object('avatars/a.png'), b'avatar')
+        self.assertEqual(Bucket().get_object('avatars/a.png', length=3), b'ava')
+
+    def test_delete_objects_in_batches(self):
+        keys = [f'avatars/{i}.png' for i in range(1001)]
+        self.put(*keys, 'avatars/kept.png')
+        calls = []
+        Bucket().connection.meta.events.register('before-call.s3.DeleteObjects', lambda **kwargs: calls.append(1))
+
+        self.assertEqual(Bucket().delete_objects(keys + ['avatars/missing.png']), [])
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self.keys(), {'avatars/kept.png'})
+
+    def test_delete_objects_task(self):
+        self.put('avatars/a.png', 'avatars/b.png')
+        delete_bucket_objects.apply((['avatars/a.png', 'avatars/b.png'],)).get()
+        self.assertEqual(self.keys(), set())
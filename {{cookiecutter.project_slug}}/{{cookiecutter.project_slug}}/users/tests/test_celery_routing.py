@@ -0,0 +1,41 @@
+from rest_framework.test import APISimpleTestCase
+
+from core.celery_app import app
+from {{cookiecutter.project_slug}}.users.tasks import (
+    delete_bucket_objects, deliver_email, record_blacklisted_token, send_verification_email
+)
+from {{cookiecutter.project_slug}}.utils.celery_routing import BULK_PRIORITY, HIGH_PRIORITY
+
+
+class TestTaskRoutes(APISimpleTestCase):
+    def route(self, task, args=(), kwargs=None):
+        return app.amqp.router.route({}, task.name, args, kwargs or {})
+
+    def test_reset_password_email_is_urgent(self):
+        route = self.route(send_verification_email, ('a@example.com', 1, 'reset_password', 'reset'))
+        self.assertEqual(route['queue'].name, 'email')
+        self.assertEqual(route['priority'], HIGH_PRIORITY)
+
+    def test_verification_email_is_bulk(self):
+        route = self.route(send_verification_email, kwargs={
+            'email_address': 'a@example.com', 'user_id': 1, 'action': 'verification', 'message': 'verify'
+        })
+        self.assertEqual(route['queue'].name, 'email')
+        self.assertEqual(route['priority'], BULK_PRIORITY)
+
+    def test_urgent_email_retry_is_urgent(self):
+        self.assertEqual(self.route(deliver_email, ({'to': ['a@example.com'], 'urgent': True}, 1))['priority'],
+                         HIGH_PRIORITY)
+        self.assertEqual(self.route(deliver_email, ({'to': ['a@example.com'], 'urgent': False}, 1))['priority'],
+                         BULK_PRIORITY)
+
+    def test_maintenance_queue(self):
+        route = self.route(record_blacklisted_token, (1, 'jti', 'token', 0))
+        self.assertEqual(route['queue'].name, 'maintenance')
+        self.assertNotIn('priority', route)
+
+    def test_storage_queue(self):
+        self.assertEqual(self.route(delete_bucket_objects, (['avatars/a.png'],))['queue'].name, 'storage')
+
+    def test_default_queue(self):
+        self.assertEqual(app.amqp.router.route({}, 'unknown.task', (), {})['queue'].name, 'default')
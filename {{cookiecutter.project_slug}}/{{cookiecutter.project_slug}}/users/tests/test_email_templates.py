@@ -0,0 +1,44 @@
+from html import unescape
+from io import StringIO
+
+from django.core.management import call_command
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+from rest_framework.test import APISimpleTestCase
+
+from {{cookiecutter.project_slug}}.utils.email_templates import EMAIL_TEMPLATES, EmailTemplate, render_email
+
+
+class TestEmailTemplates(APISimpleTestCase):
+    context = {'receiver': 'kevin@example.com', 'link': 'http://example.com/?a=1&b="2"', 'message': '<Verify>'}
+
+    def test_same_as_template_engine(self):
+        for kind, template in EMAIL_TEMPLATES.items():
+            html, text = render_email(kind, **self.context)
+            expected = render_to_string(template.template_name, self.context)
+            self.assertEqual(html, expected)
+            # plain text carries the slots unescaped
+            self.assertEqual(text, unescape(strip_tags(expected)))
+
+    def test_escapes_slots_in_html_only(self):
+        html, text = render_email('verification', **self.context)
+        self.assertIn('href="http://example.com/?a=1&amp;b=&quot;2&quot;"', html)
+        self.assertIn('<h2>&lt;Verify&gt;</h2>', html)
+        self.assertIn('http://example.com/?a=1&b="2"', text)
+
+    def test_compiled_once(self):
+        template = EmailTemplate('emails/verification.html')
+        template.render(**self.context)
+        skeleton = template.html
+        template.render(**self.context)
+        self.assertIs(template.html, skeleton)
+
+    def test_unknown_kind(self):
+        with self.assertRaises(KeyError):
+            render_email('unknown', **self.context)
+
+    def test_bench_email_templates(self):
+        out = StringIO()
+        call_command('bench_email_templates', renders=20, stdout=out)
+        self.assertIn('verification: template engine', out.getvalue())
+        self.assertIn('reset_password: template engine', out.getvalue())
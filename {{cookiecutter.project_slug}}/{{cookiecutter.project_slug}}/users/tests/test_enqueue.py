@@ -0,0 +1,47 @@
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from {{cookiecutter.project_slug}}.utils.enqueue import delay_once_on_commit, enqueue_key
+
+
+class TestDelayOnceOnCommit(APITestCase):
+    def setUp(self):
+        self.task = Mock()
+        self.task.name = self.id()
+        cache.delete_many([enqueue_key(self.task, key) for key in ('1:verification', '1:reset_password')])
+
+    def enqueue(self, key, window=60, *args):
+        with self.captureOnCommitCallbacks(execute=True):
+            delay_once_on_commit(self.task, key, window, *args)
+
+    def test_once_per_key(self):
+        self.enqueue('1:verification', 60, 'a@example.com')
+        self.enqueue('1:verification', 60, 'a@example.com')
+        self.enqueue('1:reset_password', 60, 'a@example.com')
+        self.assertEqual(self.task.delay.call_count, 2)
+        self.task.delay.assert_called_with('a@example.com')
+
+    def test_window_expires(self):
+        # the second add finds the key expired
+        with patch('{{cookiecutter.project_slug}}.utils.enqueue.cache.add', side_effect=[True, True]) as add:
+            self.enqueue('1:verification', 1)
+            self.enqueue('1:verification', 1)
+        add.assert_called_with(enqueue_key(self.task, '1:verification'), 1, timeout=1)
+        self.assertEqual(self.task.delay.call_count, 2)
+
+    def test_claimed_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            delay_once_on_commit(self.task, '1:verification', 60)
+        # rolled back, the callbacks never run
+        self.assertEqual(len(callbacks), 1)
+        self.assertIsNone(cache.get(enqueue_key(self.task, '1:verification')))
+        self.enqueue('1:verification')
+        self.task.delay.assert_called_once_with()
+
+    def test_cache_error_enqueues(self):
+        with patch('{{cookiecutter.project_slug}}.utils.enqueue.cache.add', side_effect=ConnectionError), \
+                self.assertLogs('{{cookiecutter.project_slug}}.utils.enqueue', 'WARNING'):
+            self.enqueue('1:verification')
+        self.task.delay.assert_called_once_with()
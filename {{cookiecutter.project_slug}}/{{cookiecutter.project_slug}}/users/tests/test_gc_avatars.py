@@ -0,0 +1,70 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from model_bakery import baker
+from rest_framework.test import APITestCase
+
+from {{cookiecutter.project_slug}}.users.models import UserProfile
+from {{cookiecutter.project_slug}}.users.services import delete_orphaned_avatars
+from {{cookiecutter.project_slug}}.users.tasks import gc_avatars
+from {{cookiecutter.project_slug}}.utils.bucket import Bucket
+from .test_bucket import BucketTestCase
+
+HASH = 'a' * 64
+OLD_HASH = 'b' * 64
+
+
+class TestGCAvatars(BucketTestCase, APITestCase):
+    def setUp(self):
+        super().setUp()
+        baker.make(UserProfile, avatar='avatars/1/current.png', avatar_hash=HASH, avatar_source='avatars/1/current.png')
+        baker.make(UserProfile)
+        self.put('avatars/1/current.png', 'avatars/1/replaced.png', 'avatars/2/unconfirmed.png',
+                 f'avatars/renditions/{HASH}/64.webp', f'avatars/renditions/{OLD_HASH}/64.webp', 'static/logo.png')
+
+    def gc(self, *args):
+        out = StringIO()
+        call_command('gc_avatars', *args, stdout=out)
+        return out.getvalue()
+
+    def test_deletes_orphans(self):
+        output = self.gc('--grace-hours', '0')
+        self.assertIn('3 orphaned objects deleted', output)
+        self.assertEqual(self.keys(), {'avatars/1/current.png', f'avatars/renditions/{HASH}/64.webp', 'static/logo.png'})
+
+    def test_dry_run(self):
+        output = self.gc('--grace-hours', '0', '--dry-run')
+        self.assertIn('avatars/1/replaced.png\t6\t', output)
+        self.assertIn(f'avatars/renditions/{OLD_HASH}/64.webp', output)
+        self.assertIn('3 orphaned objects, 18\xa0bytes, would be deleted', output)
+        self.assertEqual(len(self.keys()), 6)
+
+    def test_grace_period(self):
+        self.assertIn('0 orphaned objects deleted', self.gc())
+        self.assertEqual(len(self.keys()), 6)
+
+    def test_batches(self):
+        self.put(*(f'avatars/3/{i}.png' for i in range(1000)))
+        calls = []
+        Bucket().connection.meta.events.register('before-call.s3.DeleteObjects', lambda **kwargs: calls.append(1))
+        self.assertIn('1003 orphaned objects deleted', self.gc('--grace-hours', '0'))
+        self.assertEqual(len(calls), 2)
+
+    @override_settings(AVATAR_GC_GRACE=timedelta(0))
+    def test_task(self):
+        stats = gc_avatars.apply().get()
+        self.assertEqual(stats, {'orphaned': 3, 'bytes': 18, 'deleted': 3, 'failed': 0, 'kept': 0})
+
+    def test_referenced_since_listed(self):
+        def confirm(item):
+            # a profile takes the avatar, and the renditions of the old hash, between the listing and the delete
+            if item['Key'] == 'avatars/2/unconfirmed.png':
+                UserProfile.objects.filter(avatar='').update(avatar=item['Key'], avatar_hash=OLD_HASH)
+
+        stats = delete_orphaned_avatars(grace=timedelta(0), report=confirm)
+        self.assertEqual((stats['orphaned'], stats['deleted'], stats['kept']), (3, 1, 2))
+        self.assertIn('avatars/2/unconfirmed.png', self.keys())
+        self.assertIn(f'avatars/renditions/{OLD_HASH}/64.webp', self.keys())
+        self.assertNotIn('avatars/1/replaced.png', self.keys())
@@ -0,0 +1,68 @@
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework.test import APITestCase
+
+from {{cookiecutter.project_slug}}.users.models import User
+from {{cookiecutter.project_slug}}.utils.hashers import HASHERS
+
+
+def hasher_settings(algorithm, cost):
+    # what core.configs.hashers builds from the environment, overriding PASSWORD_HASHERS also resets Django's hashers
+    preferred = f'{HASHERS[algorithm].__module__}.{HASHERS[algorithm].__name__}'
+    hashers = [preferred] + [path for path in settings.PASSWORD_HASHERS if path != preferred]
+    return override_settings(PASSWORD_HASHER=algorithm, PASSWORD_HASH_COST=cost, PASSWORD_HASHERS=hashers)
+
+
+class TestTunableHashers(APITestCase):
+    def test_cost_from_settings(self):
+        with hasher_settings('pbkdf2_sha256', 1000):
+            self.assertTrue(make_password('asdF@123').startswith('pbkdf2_sha256$1000$'))
+
+    def test_cost_only_applies_to_selected_hasher(self):
+        with hasher_settings('scrypt', 1000):
+            self.assertNotIn('$1000$', make_password('asdF@123', hasher='pbkdf2_sha256'))
+
+    def test_rehash_on_login(self):
+        with hasher_settings('pbkdf2_sha256', 1000):
+            user = baker.make(User, email='kevin@example.com', is_active=True, password=make_password('asdF@123'))
+        with hasher_settings('pbkdf2_sha256', 2000):
+            response = self.client.post(reverse('users:token-obtain-pair'),
+                                        data={'email': 'kevin@example.com', 'password': 'asdF@123'})
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+
+    def test_rehash_to_new_algorithm_on_login(self):
+        user = baker.make(User, email='kevin@example.com', is_active=True, password=make_password('asdF@123'))
+        with hasher_settings('scrypt', 2 ** 12):
+            response = self.client.post(reverse('users:token-obtain-pair'),
+                                        data={'email': 'kevin@example.com', 'password': 'asdF@123'})
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$'))
+        self.assertTrue(user.check_password('asdF@123'))
+
+    def test_failed_login_keeps_hash(self):
+        with hasher_settings('pbkdf2_sha256', 1000):
+            user = baker.make(User, email='kevin@example.com', is_active=True, password=make_password('asdF@123'))
+        password = user.password
+        with hasher_settings('pbkdf2_sha256', 2000):
+            response = self.client.post(reverse('users:token-obtain-pair'),
+                                        data={'email': 'kevin@example.com', 'password': 'wrong'})
+        self.assertEqual(response.status_code, 401)
+        user.refresh_from_db()
+        self.assertEqual(user.password, password)
+
+
+class TestBenchHashersCommand(APITestCase):
+    def test_bench_hashers(self):
+        out = StringIO()
+        call_command('bench_hashers', algorithms=['pbkdf2_sha256'], budget_ms=1, rounds=1, stdout=out)
+        self.assertIn('hashes/sec/core', out.getvalue())
+        self.assertIn('Recommended: PASSWORD_HASHER=pbkdf2_sha256 PASSWORD_HASH_COST=', out.getvalue())
@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from model_bakery import baker
+from rest_framework.test import APITestCase
+
+from {{cookiecutter.project_slug}}.users.models import User, UserProfile
+
+
+class TestImportUsersCommand(APITestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def import_users(self, path, **options):
+        out = StringIO()
+        call_command('import_users', path, stdout=out, **options)
+        return out.getvalue()
+
+    def test_import_csv(self):
+        path = self.write('users.csv', 'username,email,password,bio\nkevin,kevin@Example.com,asdF@123,hello\n'
+                                       'amir,amir@example.com,asdF@123,\n')
+        out = self.import_users(path, workers=2, active=True)
+        self.assertIn('Imported 2 users', out)
+        self.assertIn('rows/sec', out)
+        kevin = User.objects.get(username='kevin')
+        self.assertEqual(kevin.email, 'kevin@example.com')
+        self.assertTrue(kevin.is_active)
+        self.assertTrue(kevin.check_password('asdF@123'))
+        self.assertEqual(kevin.profile.bio, 'hello')
+        self.assertIsNone(User.objects.get(username='amir').profile.bio)
+
+    def test_import_ndjson_pre_hashed(self):
+        rows = [{'username': f'user{i}', 'email': f'user{i}@example.com', 'password': make_password('asdF@123')}
+                for i in range(5)]
+        path = self.write('users.ndjson', '\n'.join(json.dumps(row) for row in rows))
+        out = self.import_users(path, pre_hashed=True, batch_size=2)
+        self.assertIn('5 rows processed', out)
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(UserProfile.objects.count(), 5)
+        self.assertFalse(User.objects.filter(is_active=True).exists())
+        self.assertTrue(User.objects.get(username='user3').check_password('asdF@123'))
+
+    def test_pre_hashed_rejects_plain_passwords(self):
+        path = self.write('users.ndjson', json.dumps({'username': 'kevin', 'email': 'k@example.com', 'password': 'x'}))
+        with self.assertRaises(CommandError):
+            self.import_users(path, pre_hashed=True)
+        self.assertFalse(User.objects.exists())
+
+    def test_skips_taken_usernames_and_emails(self):
+        baker.make(User, username='kevin', email='kevin@example.com')
+        path = self.write('users.csv', 'username,email,password\nKEVIN,new@example.com,asdF@123\n'
+                                       'amir,Kevin@example.com,asdF@123\namir,amir@example.com,asdF@123\n'
+                                       'sara,sara@example.com,asdF@123\n')
+        out = self.import_users(path, workers=1)
+        self.assertIn('Imported 2 users (2 skipped)', out)
+        self.assertEqual(User.objects.count(), 3)
+
+    def test_missing_field(self):
+        path = self.write('users.csv', 'username,email,password\nkevin,,asdF@123\n')
+        with self.assertRaisesMessage(CommandError, 'row 1'):
+            self.import_users(path, workers=1)
+
+    def test_resume_from_checkpoint(self):
+        rows = [{'username': f'user{i}', 'email': f'user{i}@example.com', 'password': make_password('asdF@123')}
+                for i in range(6)]
+        path = self.write('users.ndjson', '\n'.join(json.dumps(row) for row in rows))
+        checkpoint = os.path.join(self.directory.name, 'checkpoint.json')
+        with open(checkpoint, 'w') as file:
+            json.dump({'path': path, 'rows': 4}, file)
+        out = self.import_users(path, pre_hashed=True, checkpoint=checkpoint)
+        self.assertIn('resuming after 4 rows', out)
+        self.assertEqual(list(User.objects.order_by('username').values_list('username', flat=True)),
+                         ['user4', 'user5'])
+        with open(checkpoint) as file:
+            self.assertEqual(json.load(file)['rows'], 6)
+
+    def test_checkpoint_of_another_file(self):
+        path = self.write('users.csv', 'username,email,password\n')
+        checkpoint = self.write('checkpoint.json', json.dumps({'path': 'other.csv', 'rows': 4}))
+        with self.assertRaises(CommandError):
+            self.import_users(path, checkpoint=checkpoint)
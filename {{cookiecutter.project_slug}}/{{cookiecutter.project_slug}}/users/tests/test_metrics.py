@@ -0,0 +1,84 @@
+from django.contrib.auth.hashers import make_password
+from django.core import mail
+from django.test import override_settings
+from django.urls import reverse
+from model_bakery import baker
+from prometheus_client import REGISTRY
+from rest_framework.test import APITestCase
+
+from {{cookiecutter.project_slug}}.users.models import User
+from {{cookiecutter.project_slug}}.users.tasks import send_verification_email
+from {{cookiecutter.project_slug}}.utils.bucket import Bucket
+from {{cookiecutter.project_slug}}.utils.send_email import send_link
+from .test_bucket import BucketTestCase
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestMetrics(APITestCase):
+    def test_request_metrics(self):
+        baker.make(User, email='kevin@example.com', is_active=True, password=make_password('asdF@123'))
+        labels = {'view': 'users:token-obtain-pair', 'method': 'POST', 'status': '200'}
+        before = sample('http_request_duration_seconds_count', **labels)
+        queries_before = sample('http_request_db_queries_sum', view='users:token-obtain-pair')
+
+        response = self.client.post(reverse('users:token-obtain-pair'),
+                                    data={'email': 'kevin@example.com', 'password': 'asdF@123'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sample('http_request_duration_seconds_count', **labels), before + 1)
+        self.assertGreater(sample('http_request_db_queries_sum', view='users:token-obtain-pair'), queries_before)
+
+    def test_unresolved_paths_share_a_label(self):
+        before = sample('http_request_duration_seconds_count', view='<unresolved>', method='GET', status='404')
+        self.client.get('/no/such/path/')
+        self.client.get('/another/missing/path/')
+        self.assertEqual(sample('http_request_duration_seconds_count', view='<unresolved>', method='GET',
+                                status='404'), before + 2)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('users:users-list'))
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'http_request_duration_seconds_bucket{', response.content)
+        self.assertIn(b'celery_task_failures_total', response.content)
+
+    def test_metrics_endpoint_off_without_token(self):
+        with override_settings(METRICS_TOKEN=''):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+        with override_settings(METRICS_TOKEN='secret'):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+            response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong')
+            self.assertEqual(response.status_code, 403)
+
+    @override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def test_task_metrics(self):
+        user = baker.make(User)
+        task = send_verification_email.name
+        duration = sample('celery_task_duration_seconds_count', task=task)
+        failures = sample('celery_task_failures_total', task=task)
+
+        send_verification_email.apply((user.email, user.id, 'verification', 'verify'))
+        self.assertEqual(sample('celery_task_duration_seconds_count', task=task), duration + 1)
+        self.assertEqual(sample('celery_task_failures_total', task=task), failures)
+
+        send_verification_email.apply((user.email, 0, 'verification', 'verify'))
+        self.assertEqual(sample('celery_task_failures_total', task=task), failures + 1)
+
+    @override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def test_smtp_metrics(self):
+        before = sample('smtp_send_duration_seconds_count')
+        send_link('a@example.com', 'http://localhost/link', 'subject')
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(sample('smtp_send_duration_seconds_count'), before + 1)
+
+
+class TestS3Metrics(BucketTestCase):
+    def test_s3_metrics(self):
+        self.put('avatars/a.png')
+        before = sample('s3_request_duration_seconds_count', operation='DeleteObject')
+        Bucket().delete_object('avatars/a.png')
+        self.assertEqual(self.keys(), set())
+        self.assertEqual(sample('s3_request_duration_seconds_count', operation='DeleteObject'), before + 1)
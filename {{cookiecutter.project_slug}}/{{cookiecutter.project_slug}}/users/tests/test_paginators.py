@@ -0,0 +1,87 @@
+from unittest.mock import patch
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from {{cookiecutter.project_slug}}.users.models import User
+from {{cookiecutter.project_slug}}.users.views import UsersListAPI
+
+
+class PagedUsersListAPI(UsersListAPI):
+    pagination_count_strategy = 'exact'
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TestNeatPaginationCountStrategies(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        baker.make(User, 24)
+        cls.admin = baker.make(User, is_active=True, is_admin=True)
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.token = str(AccessToken.for_user(self.admin))
+        self.url = reverse('users:users-list')
+
+    def get(self, strategy, params=None):
+        view = PagedUsersListAPI.as_view(pagination_count_strategy=strategy)
+        request = self.factory.get(f'{self.url}?{urlencode(params or {})}', HTTP_AUTHORIZATION='Bearer ' + self.token)
+        return view(request)
+
+    def test_exact_count(self):
+        response = self.get('exact')
+        self.assertEqual(response.data['pagination']['items_count'], 25)
+        self.assertEqual(response.data['pagination']['pages_count'], 3)
+
+    def test_cached_count(self):
+        self.get('cached')
+        baker.make(User, 5)
+        response = self.get('cached', {'page': 2})
+        self.assertEqual(response.data['pagination']['items_count'], 25)
+        self.assertEqual(len(response.data['data']), 10)
+
+    def test_cached_count_keyed_by_filters(self):
+        self.get('cached')
+        response = self.get('cached', {'is_admin': True})
+        self.assertEqual(response.data['pagination']['items_count'], 1)
+
+    def test_cached_count_without_cache(self):
+        with patch.object(cache, 'get', side_effect=ConnectionError), \
+                patch.object(cache, 'set', side_effect=ConnectionError), \
+                self.assertLogs('{{cookiecutter.project_slug}}.utils.paginators', 'WARNING'):
+            response = self.get('cached', {'page': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['pagination']['items_count'], 25)
+
+    def test_estimated_count_falls_back_to_exact(self):
+        response = self.get('estimate', {'is_admin': False})
+        self.assertEqual(response.data['pagination']['items_count'], 24)
+
+    def test_no_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get('none', {'page': 2})
+        self.assertFalse([query for query in queries if 'COUNT(' in query['sql']])
+        pagination = response.data['pagination']
+        self.assertIsNone(pagination['items_count'])
+        self.assertIsNone(pagination['pages_count'])
+        self.assertIsNone(pagination['last'])
+        self.assertTrue(pagination['has_next'])
+        self.assertTrue(pagination['has_previous'])
+
+    def test_no_count_last_page(self):
+        response = self.get('none', {'page': 3})
+        self.assertEqual(len(response.data['data']), 5)
+        self.assertFalse(response.data['pagination']['has_next'])
+        self.assertIsNone(response.data['pagination']['next_page'])
+
+    def test_no_count_out_of_range(self):
+        response = self.get('none', {'page': 4})
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,95 @@
+import time
+{%- if cookiecutter.caches == 'redis' or cookiecutter.celery_message_broker == 'redis' %}
+import uuid
+{%- endif %}
+from unittest.mock import patch
+
+from django.core import mail
+from django.test import override_settings
+from rest_framework.test import APISimpleTestCase
+
+from {{cookiecutter.project_slug}}.utils import rate_limit
+from {{cookiecutter.project_slug}}.utils.send_email import EmailBatcher
+
+
+class TestLocalTokenBucket(APISimpleTestCase):
+    bucket_class = rate_limit.LocalTokenBucket
+
+    def bucket(self, rate, capacity):
+        return self.bucket_class(self.id(), rate, capacity)
+
+    def test_burst(self):
+        bucket = self.bucket(rate=1, capacity=3)
+        self.assertEqual([bucket.take() for _ in range(3)], [0, 0, 0])
+        self.assertGreater(bucket.take(), 0.5)
+
+    def test_refill(self):
+        bucket = self.bucket(rate=50, capacity=1)
+        self.assertEqual(bucket.take(), 0)
+        time.sleep(0.05)
+        self.assertEqual(bucket.take(), 0)
+
+    def test_wait(self):
+        bucket = self.bucket(rate=100, capacity=1)
+        start = time.monotonic()
+        for _ in range(6):
+            bucket.wait()
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+{%- if cookiecutter.caches == 'redis' or cookiecutter.celery_message_broker == 'redis' %}
+
+
+class TestRedisTokenBucket(TestLocalTokenBucket):
+    bucket_class = rate_limit.RedisTokenBucket
+
+    def bucket(self, rate, capacity):
+        return self.bucket_class(uuid.uuid4().hex, rate, capacity)
+
+    def test_shared_between_buckets(self):
+        name = uuid.uuid4().hex
+        first, second = self.bucket_class(name, 1, 2), self.bucket_class(name, 1, 2)
+        self.assertEqual([first.take(), second.take()], [0, 0])
+        self.assertGreater(first.take(), 0)
+        self.assertGreater(second.take(), 0)
+
+    @override_settings(RATE_LIMIT_REDIS_URL='redis://127.0.0.1:1')
+    def test_redis_down(self):
+        bucket = self.bucket(rate=1, capacity=1)
+        with self.assertLogs('{{cookiecutter.project_slug}}.utils.rate_limit'):
+            self.assertEqual(bucket.take(), 0)
+            self.assertGreater(bucket.take(), 0)
+{%- endif %}
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+                   EMAIL_BATCH_SIZE=100, EMAIL_BATCH_MAX_DELAY_MS=60_000)
+class TestEmailRateLimit(APISimpleTestCase):
+    def send(self, count):
+        batcher = EmailBatcher()
+        for i in range(count):
+            batcher.add({'subject': 's', 'body': 'b', 'from_email': 'from@example.com', 'to': [f'{i}@example.com'],
+                         'html': '<p>b</p>'})
+        return batcher.flush()
+
+    def test_unlimited(self):
+        with patch.object(rate_limit.LocalTokenBucket, 'wait') as wait:
+            self.assertEqual(self.send(5), (5, 0))
+        wait.assert_not_called()
+
+    @override_settings(EMAIL_RATE_LIMIT=100, EMAIL_RATE_BURST=2)
+    def test_limited(self):
+        start = time.monotonic()
+        self.assertEqual(self.send(6), (6, 0))
+        self.assertGreaterEqual(time.monotonic() - start, 0.03)
+        self.assertEqual(len(mail.outbox), 6)
+
+    def test_bucket_error(self):
+        failures = []
+        batcher = EmailBatcher(on_failure=lambda data, attempt: failures.append(data['to']))
+        batcher.add({'subject': 's', 'body': 'b', 'from_email': 'from@example.com', 'to': ['a@example.com'],
+                     'html': '<p>b</p>'})
+        with patch('{{cookiecutter.project_slug}}.utils.send_email.email_bucket') as email_bucket:
+            email_bucket.return_value.take.side_effect = ConnectionError
+            with self.assertLogs('{{cookiecutter.project_slug}}.utils.send_email'):
+                self.assertEqual(batcher.flush(), (0, 1))
+        self.assertEqual(failures, [['a@example.com']])
+        self.assertEqual(mail.outbox, [])
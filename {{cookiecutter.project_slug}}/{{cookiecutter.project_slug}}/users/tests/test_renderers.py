@@ -0,0 +1,90 @@
+import datetime
+import decimal
+import uuid
+from io import BytesIO, StringIO
+from zoneinfo import ZoneInfo
+
+from django.core.management import call_command
+from django.utils.translation import gettext_lazy
+from model_bakery import baker
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APISimpleTestCase, APITestCase
+
+from {{cookiecutter.project_slug}}.users.models import User
+from {{cookiecutter.project_slug}}.utils.parsers import ORJSONParser
+from {{cookiecutter.project_slug}}.utils.renderers import ORJSONRenderer
+
+
+class TestORJSONRenderer(APISimpleTestCase):
+    def assertSameOutput(self, data, accepted_media_type=None):
+        self.assertEqual(
+            ORJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type)
+        )
+
+    def test_datetimes(self):
+        moment = datetime.datetime(2024, 8, 30, 12, 30, 15, 123456)
+        self.assertSameOutput({
+            'naive': moment,
+            'utc': moment.replace(tzinfo=datetime.timezone.utc),
+            'tehran': moment.replace(tzinfo=ZoneInfo('Asia/Tehran')),
+            'london': moment.replace(month=1, tzinfo=ZoneInfo('Europe/London')),
+            'no_microseconds': moment.replace(microsecond=0, tzinfo=datetime.timezone.utc),
+            'date': moment.date(),
+            'time': moment.time(),
+            'timedelta': datetime.timedelta(hours=1, microseconds=5),
+        })
+
+    def test_decimals(self):
+        self.assertSameOutput([
+            decimal.Decimal('12.50'), decimal.Decimal('1e16'), decimal.Decimal('0.0000025'), decimal.Decimal('-0')
+        ])
+
+    def test_lazy_strings(self):
+        self.assertSameOutput({'message': gettext_lazy('This field is required.'), 'list': [gettext_lazy('ok')]})
+
+    def test_other_types(self):
+        self.assertSameOutput({
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'unicode': 'سلام \u2028 \u2029',
+            'tuple': (1, 2.5, None, True),
+            1: 'int key',
+            'bytes': b'blob',
+        })
+
+    def test_indent_falls_back(self):
+        self.assertSameOutput({'a': [1, 2]}, 'application/json; indent=4')
+
+    def test_huge_int_falls_back(self):
+        self.assertSameOutput({'big': 2 ** 70})
+
+    def test_none(self):
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+
+class TestORJSONParser(APISimpleTestCase):
+    def parse(self, body):
+        return ORJSONParser().parse(BytesIO(body))
+
+    def test_parse(self):
+        body = '{"username": "کاربر", "ids": [1, 2.5, null], "big": 1180591620717411303424}'.encode()
+        self.assertEqual(self.parse(body), JSONParser().parse(BytesIO(body)))
+
+    def test_invalid_json(self):
+        with self.assertRaises(ParseError):
+            self.parse(b'{"username": ')
+
+    def test_nan_rejected(self):
+        with self.assertRaises(ParseError):
+            self.parse(b'{"value": NaN}')
+
+
+class TestBenchJsonCommand(APITestCase):
+    def test_bench_json(self):
+        baker.make(User, 20)
+        out = StringIO()
+        call_command('bench_json', iterations=5, stdout=out)
+        self.assertIn('page of 20 users', out.getvalue())
+        self.assertIn('render: stdlib', out.getvalue())
@@ -0,0 +1,90 @@
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from {{cookiecutter.project_slug}}.search.backends import ContainsSearchBackend
+from {{cookiecutter.project_slug}}.users.models import User
+from {{cookiecutter.project_slug}}.users.views import UsersListAPI
+
+
+class TestUsersSearch(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        baker.make(User, 20)
+        cls.kevin = baker.make(User, username='kevin', email='kevin@example.com')
+        cls.kevin_smith = baker.make(User, username='kevin_smith', email='smith@gmail.com')
+        cls.admin = baker.make(User, username='admin', email='admin@gmail.com', is_active=True, is_admin=True)
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.admin_token = str(AccessToken.for_user(self.admin))
+        self.url = reverse('users:users-list')
+
+    def search(self, view=UsersListAPI, **params):
+        request = self.factory.get(f'{self.url}?{urlencode(params)}', HTTP_AUTHORIZATION='Bearer ' + self.admin_token)
+        response = view.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def usernames(self, response):
+        return [user['username'] for user in response.data['data']]
+
+    def test_search_username_and_email(self):
+        response = self.search(search='kevin')
+        self.assertCountEqual(self.usernames(response), ['kevin', 'kevin_smith'])
+
+    def test_search_substring(self):
+        response = self.search(search='mith@gma')
+        self.assertEqual(self.usernames(response), ['kevin_smith'])
+
+    def test_search_is_case_insensitive(self):
+        response = self.search(search='KEVIN@EXAMPLE')
+        self.assertEqual(self.usernames(response), ['kevin'])
+
+    def test_search_every_term_must_match(self):
+        response = self.search(search='kevin gmail')
+        self.assertEqual(self.usernames(response), ['kevin_smith'])
+
+    def test_search_short_term(self):
+        response = self.search(search='_s')
+        self.assertEqual(self.usernames(response), ['kevin_smith'])
+
+    def test_search_relevance_ordering(self):
+        response = self.search(search='kevin')
+        self.assertEqual(self.usernames(response)[0], 'kevin')
+
+    def test_search_follows_updates(self):
+        self.kevin.username = 'renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kevin.save()
+        self.assertEqual(self.usernames(self.search(search='renamed')), ['renamed'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kevin.delete()
+        self.assertEqual(self.usernames(self.search(search='renamed')), [])
+
+    def test_search_cursor_pagination(self):
+        usernames = []
+        url = f"{self.url}?{urlencode({'search': 'e', 'pagination': 'cursor', 'limit': 5})}"
+        while url:
+            request = self.factory.get(url, HTTP_AUTHORIZATION='Bearer ' + self.admin_token)
+            response = UsersListAPI.as_view()(request)
+            usernames += self.usernames(response)
+            url = response.data['pagination']['next_page']
+        self.assertEqual(len(usernames), len(set(usernames)))
+        self.assertEqual(len(usernames), User.objects.filter(username__icontains='e').count()
+                         + User.objects.filter(email__icontains='e').exclude(username__icontains='e').count())
+
+    def test_search_matches_contains_backend(self):
+        class ContainsUsersListAPI(UsersListAPI):
+            search_backend = ContainsSearchBackend
+
+        for term in ('kevin', 'gmail.com', 'smith kevin', 'zzz'):
+            self.assertCountEqual(
+                self.usernames(self.search(search=term, limit=20)),
+                self.usernames(self.search(ContainsUsersListAPI, search=term, limit=20))
+            )
@@ -0,0 +1,164 @@
+import socket
+import socketserver
+import threading
+import time
+from io import StringIO
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import override_settings
+from model_bakery import baker
+from rest_framework.test import APISimpleTestCase, APITestCase
+
+from {{cookiecutter.project_slug}}.users.models import User
+from {{cookiecutter.project_slug}}.users.tasks import send_verification_email
+from {{cookiecutter.project_slug}}.utils.send_email import EmailBatcher, email_batcher, retry_failed_email
+
+
+def email(to: str) -> dict:
+    return {'subject': 'subject', 'body': 'body', 'from_email': 'from@example.com', 'to': [to], 'html': '<p>body</p>'}
+
+
+class FailingEmailBackend(EmailBackend):
+    """Fails emails to failing@example.com."""
+
+    def send_messages(self, messages):
+        if any('failing@example.com' in message.to for message in messages):
+            raise ConnectionError
+        return super().send_messages(messages)
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib, counting connections and delivered emails."""
+
+    def handle(self):
+        self.server.connections += 1
+        self.wfile.write(b'220 localhost\r\n')
+        while line := self.rfile.readline():
+            command = line[:4].upper()
+            if command == b'DATA':
+                self.wfile.write(b'354 go ahead\r\n')
+                while self.rfile.readline() != b'.\r\n':
+                    pass
+                self.server.emails += 1
+                self.wfile.write(b'250 ok\r\n')
+            elif command == b'QUIT':
+                self.wfile.write(b'221 bye\r\n')
+                return
+            else:
+                self.wfile.write(b'250 ok\r\n')
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    connections = 0
+    emails = 0
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+                   EMAIL_BATCH_SIZE=3, EMAIL_BATCH_MAX_DELAY_MS=60_000)
+class TestEmailBatcher(APISimpleTestCase):
+    def setUp(self):
+        self.failures = []
+        self.batcher = EmailBatcher(on_failure=lambda data, attempt: self.failures.append((data['to'], attempt)))
+        self.addCleanup(self.batcher.flush)
+
+    def test_flush_on_batch_size(self):
+        self.batcher.add(email('a@example.com'))
+        self.batcher.add(email('b@example.com'))
+        self.assertEqual(len(mail.outbox), 0)
+        self.batcher.add(email('c@example.com'))
+        self.assertEqual([message.to for message in mail.outbox], [['a@example.com'], ['b@example.com'],
+                                                                   ['c@example.com']])
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+
+    def test_urgent_email_is_not_batched(self):
+        self.batcher.add(email('a@example.com'))
+        self.batcher.add({**email('urgent@example.com'), 'urgent': True})
+        self.assertEqual([message.to for message in mail.outbox], [['urgent@example.com'], ['a@example.com']])
+
+    @override_settings(EMAIL_BATCH_MAX_DELAY_MS=10)
+    def test_flush_on_delay(self):
+        self.batcher.add(email('a@example.com'))
+        for _ in range(100):
+            if mail.outbox:
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(EMAIL_BACKEND='{{cookiecutter.project_slug}}.users.tests.test_send_email.FailingEmailBackend')
+    def test_failure_isolation(self):
+        self.batcher.add(email('a@example.com'))
+        self.batcher.add(email('failing@example.com'), attempt=1)
+        with self.assertLogs('{{cookiecutter.project_slug}}.utils.send_email'):
+            self.batcher.add(email('c@example.com'))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(self.failures, [(['failing@example.com'], 2)])
+
+    def test_throughput_over_smtp(self):
+        server = SMTPServer(('127.0.0.1', 0), SMTPHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        smtp = {'EMAIL_BACKEND': 'django.core.mail.backends.smtp.EmailBackend', 'EMAIL_HOST': '127.0.0.1',
+                'EMAIL_PORT': server.server_address[1], 'EMAIL_USE_TLS': False, 'EMAIL_HOST_USER': '',
+                'EMAIL_HOST_PASSWORD': '', 'EMAIL_BATCH_SIZE': 25}
+        with override_settings(**smtp):
+            for i in range(100):
+                self.batcher.add(email(f'user{i}@example.com'))
+            self.batcher.flush()
+        self.assertEqual(server.emails, 100)
+        self.assertEqual(server.connections, 4)
+
+    def test_smtp_server_down(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        with override_settings(EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend', EMAIL_HOST='127.0.0.1',
+                               EMAIL_PORT=port, EMAIL_USE_TLS=False, EMAIL_TIMEOUT=1):
+            self.batcher.add(email('a@example.com'))
+            with self.assertLogs('{{cookiecutter.project_slug}}.utils.send_email'):
+                self.assertEqual(self.batcher.flush(), (0, 1))
+        self.assertEqual(self.failures, [(['a@example.com'], 1)])
+
+
+@override_settings(EMAIL_MAX_RETRIES=2)
+class TestRetryFailedEmail(APISimpleTestCase):
+    @patch('{{cookiecutter.project_slug}}.users.tasks.deliver_email.apply_async')
+    def test_retry_with_backoff(self, mock_apply_async):
+        retry_failed_email(email('a@example.com'), 2)
+        mock_apply_async.assert_called_once_with((email('a@example.com'), 2), countdown=4)
+
+    @patch('{{cookiecutter.project_slug}}.users.tasks.deliver_email.apply_async')
+    def test_give_up(self, mock_apply_async):
+        with self.assertLogs('{{cookiecutter.project_slug}}.utils.send_email', 'ERROR'):
+            retry_failed_email(email('a@example.com'), 3)
+        mock_apply_async.assert_not_called()
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+                   EMAIL_BATCH_SIZE=3, EMAIL_BATCH_MAX_DELAY_MS=60_000)
+class TestSendVerificationEmailTask(APITestCase):
+    def test_batched(self):
+        self.addCleanup(email_batcher.flush)
+        user = baker.make(User)
+        send_verification_email(user.email, user.id, 'verification', 'Verification URL')
+        self.assertEqual(len(mail.outbox), 0)
+        # the reset is urgent, it flushes the batch ahead of the verification
+        send_verification_email(user.email, user.id, 'reset_password', 'Reset Password Link:')
+        self.assertEqual([message.subject for message in mail.outbox], ['Reset Password Link:', 'Verification URL'])
+        self.assertIn('new password', mail.outbox[0].body)
+        self.assertIn('/users/password/set/', mail.outbox[0].alternatives[0][0])
+        self.assertIn('verify your email address', mail.outbox[1].body)
+        self.assertIn('/users/register/verify/', mail.outbox[1].body)
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class TestBenchEmailCommand(APISimpleTestCase):
+    def test_bench_email(self):
+        out = StringIO()
+        call_command('bench_email', emails=10, batch_size=5, stdout=out)
+        self.assertIn('batches of 5', out.getvalue())
+        self.assertEqual(len(mail.outbox), 20)
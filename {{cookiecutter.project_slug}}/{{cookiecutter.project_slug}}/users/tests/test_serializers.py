@@ -1,15 +1,83 @@
+import time
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import override_settings
 from model_bakery import baker
 from rest_framework.exceptions import ValidationError
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
 
-from {{cookiecutter.project_slug}}.users.models import User
+from {{cookiecutter.project_slug}}.users.models import User, UserProfile
 from {{cookiecutter.project_slug}}.users.serializers import (
+    MyTokenObtainPairSerializer,
     UserSerializer,
     UserRegisterSerializer,
     ResendVerificationEmailSerializer,
     ChangePasswordSerializer,
     SetPasswordSerializer
 )
+from {{cookiecutter.project_slug}}.utils.tokens import outstanding_tokens
+
+
+class TestMyTokenObtainPairSerializer(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('kevin', 'kevin@gmail.com', 'asdF@123')
+        User.objects.filter(pk=cls.user.pk).update(is_active=True)
+
+    def setUp(self):
+        self.addCleanup(outstanding_tokens.flush)
+
+    def login(self):
+        serializer = MyTokenObtainPairSerializer(data={'email': 'kevin@gmail.com', 'password': 'asdF@123'})
+        self.assertTrue(serializer.is_valid())
+        return serializer.validated_data
+
+    def test_one_token_pair_per_login(self):
+        data = self.login()
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertEqual(OutstandingToken.objects.get().jti, RefreshToken(data['refresh'])['jti'])
+        self.assertEqual(data['user']['username'], 'kevin')
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_login)
+
+    @override_settings(OUTSTANDING_TOKENS_BATCH_SIZE=3)
+    def test_batched_outstanding_tokens(self):
+        self.login()
+        self.login()
+        self.assertEqual(OutstandingToken.objects.count(), 0)
+        self.login()
+        self.assertEqual(OutstandingToken.objects.count(), 3)
+
+    @override_settings(OUTSTANDING_TOKENS_BATCH_SIZE=3, OUTSTANDING_TOKENS_MAX_DELAY=0.01)
+    def test_batched_outstanding_tokens_max_delay(self):
+        # written from the timer's thread, which the test's transaction can't see
+        with patch.object(OutstandingToken.objects, 'bulk_create') as bulk_create:
+            self.login()
+            for _ in range(100):
+                if bulk_create.called:
+                    break
+                time.sleep(0.01)
+        self.assertEqual(len(bulk_create.call_args.args[0]), 1)
+        self.assertEqual(outstanding_tokens.rows, [])
+
+    @override_settings(OUTSTANDING_TOKENS_BATCH_SIZE=3)
+    def test_blacklist_buffered_token(self):
+        refresh = RefreshToken(self.login()['refresh'])
+        refresh.blacklist()
+        outstanding_tokens.flush()
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=refresh['jti']).exists())
+
+    def test_bench_logins(self):
+        out = StringIO()
+        call_command('bench_logins', logins=3, batch_size=2, skip_hashing=True, stdout=out)
+        self.assertIn('two pairs per login', out.getvalue())
+        self.assertIn('1.00 outstanding tokens per login', out.getvalue())
+        self.assertEqual(OutstandingToken.objects.count(), 0)
 
 
 class TestUserSerializer(APITestCase):
@@ -29,18 +97,38 @@ class TestUserSerializer(APITestCase):
         self.assertEqual(len(serializer.errors), 2)
 
     def test_invalid_username(self):
-        data = {'username': 'username', 'email': 'another_email@gmail.com', 'password': 'password'}
-        serializer = UserSerializer(data=data)
-        self.assertFalse(serializer.is_valid())
-        self.assertEqual(len(serializer.errors), 1)
-        self.assertEqual(serializer.errors['username'][0], 'user with this username already exists.')
+        user = baker.make(User, username='another_username', email='another_email@gmail.com')
+        baker.make(UserProfile, owner=user)
+        serializer = UserSerializer(instance=user, data={'username': 'username'}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        with self.assertRaises(ValidationError) as error:
+            serializer.save()
+        self.assertEqual(error.exception.detail['username'][0], 'user with this username already exists.')
 
     def test_invalid_email(self):
-        data = {'username': 'another_username', 'email': 'email@gmail.com', 'password': 'password'}
-        serializer = UserSerializer(data=data)
-        self.assertFalse(serializer.is_valid())
-        self.assertEqual(len(serializer.errors), 1)
-        self.assertEqual(serializer.errors['email'][0], 'user with this email already exists.')
+        user = baker.make(User, username='another_username', email='another_email@gmail.com')
+        baker.make(UserProfile, owner=user)
+        serializer = UserSerializer(instance=user, data={'email': 'email@gmail.com'}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        with self.assertRaises(ValidationError) as error:
+            serializer.save()
+        self.assertEqual(error.exception.detail['email'][0], 'user with this email already exists.')
+
+    def test_invalid_email_case_insensitive(self):
+        user = baker.make(User, username='another_username', email='another_email@gmail.com')
+        baker.make(UserProfile, owner=user)
+        serializer = UserSerializer(instance=user, data={'email': 'EMAIL@gmail.com'}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        with self.assertRaises(ValidationError) as error:
+            serializer.save()
+        self.assertEqual(error.exception.detail['email'][0], 'user with this email already exists.')
+        user.refresh_from_db()
+        self.assertEqual(user.email, 'another_email@gmail.com')
+
+    def test_validation_does_not_query(self):
+        data = {'username': 'username', 'email': 'email@gmail.com'}
+        with self.assertNumQueries(0):
+            UserSerializer(data=data).is_valid()
 
 
 class TestUserRegisterSerializer(APITestCase):
@@ -71,16 +159,27 @@ class TestUserRegisterSerializer(APITestCase):
     def test_not_unique_username(self):
         data = {'username': 'username', 'email': 'kevin@gmail.com', 'password': 'asdF@123', 'password2': 'asdF@123'}
         serializer = UserRegisterSerializer(data=data)
-        self.assertFalse(serializer.is_valid())
-        self.assertEqual(len(serializer.errors), 1)
-        self.assertEqual(serializer.errors['username'][0], 'user with this username already exists.')
+        self.assertTrue(serializer.is_valid())
+        with self.assertRaises(ValidationError) as error:
+            serializer.save()
+        self.assertEqual(error.exception.detail['username'][0], 'user with this username already exists.')
 
     def test_not_unique_email(self):
         data = {'username': 'kevin', 'email': 'email@gmail.com', 'password': 'asdF@123', 'password2': 'asdF@123'}
         serializer = UserRegisterSerializer(data=data)
-        self.assertFalse(serializer.is_valid())
-        self.assertEqual(len(serializer.errors), 1)
-        self.assertEqual(serializer.errors['email'][0], 'user with this email already exists.')
+        self.assertTrue(serializer.is_valid())
+        with self.assertRaises(ValidationError) as error:
+            serializer.save()
+        self.assertEqual(error.exception.detail['email'][0], 'user with this email already exists.')
+
+    def test_not_unique_case_insensitive(self):
+        data = {'username': 'USERNAME', 'email': 'kevin@gmail.com', 'password': 'asdF@123', 'password2': 'asdF@123'}
+        serializer = UserRegisterSerializer(data=data)
+        self.assertTrue(serializer.is_valid())
+        with self.assertRaises(ValidationError) as error:
+            serializer.save()
+        self.assertEqual(error.exception.detail['username'][0], 'user with this username already exists.')
+        self.assertFalse(User.objects.filter(email='kevin@gmail.com').exists())
 
     def test_empty_password2(self):
         data = {'username': 'kevin', 'email': 'kevin@gmail.com', 'password': 'asdF@123'}
@@ -105,6 +204,11 @@ class TestResendVerificationEmailSerializer(APITestCase):
         self.assertTrue(serializer.is_valid())
         self.assertEqual(str(serializer.validated_data['user']), 'username - email@gmail.com')
 
+    def test_email_case_insensitive(self):
+        serializer = ResendVerificationEmailSerializer(data={'email': 'Email@Gmail.com'})
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data['user'].username, 'username')
+
     def test_invalid_email(self):
         serializer = ResendVerificationEmailSerializer(data={'email': 'kevin@gmail.com'})
         self.assertFalse(serializer.is_valid())
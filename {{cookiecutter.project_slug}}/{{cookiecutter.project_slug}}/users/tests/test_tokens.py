@@ -0,0 +1,152 @@
+import time
+from unittest.mock import patch
+
+{% if cookiecutter.caches == 'redis' -%}
+import redis
+from django.conf import settings
+{% endif -%}
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from {{cookiecutter.project_slug}}.users.models import User
+from {{cookiecutter.project_slug}}.utils.blacklist import (
+{%- if cookiecutter.caches == 'redis' %}
+    BloomCacheBlacklistStore,
+{%- endif %}
+    BloomFilter,
+    CacheBlacklistStore,
+    DatabaseBlacklistStore,
+    get_blacklist_store
+)
+from {{cookiecutter.project_slug}}.utils.tokens import RefreshToken
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class TestTokenRefreshRotation(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = baker.make(User, is_active=True)
+        self.url = reverse('users:token-refresh')
+
+    def test_rotated_token_is_blacklisted(self):
+        refresh = str(RefreshToken.for_user(self.user))
+        response = self.client.post(self.url, {'refresh': refresh})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data['refresh'], refresh)
+        self.assertEqual(self.client.post(self.url, {'refresh': refresh}).status_code, 401)
+        self.assertEqual(self.client.post(self.url, {'refresh': response.data['refresh']}).status_code, 200)
+
+    def test_blocked_token_cannot_refresh(self):
+        refresh = str(RefreshToken.for_user(self.user))
+        self.client.post(reverse('users:token-block'), {'refresh': refresh})
+        self.assertEqual(self.client.post(self.url, {'refresh': refresh}).status_code, 401)
+
+
+class TestDatabaseBlacklistStore(APITestCase):
+    def test_add_and_contains(self):
+        user = baker.make(User)
+        token = RefreshToken.for_user(user)
+        store = DatabaseBlacklistStore()
+        self.assertFalse(store.contains(token['jti']))
+        store.add(user.id, token['jti'], str(token), token['exp'])
+        self.assertTrue(store.contains(token['jti']))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class TestCacheBlacklistStore(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = baker.make(User)
+        self.token = RefreshToken.for_user(self.user)
+        self.store = CacheBlacklistStore()
+
+    @patch('{{cookiecutter.project_slug}}.users.tasks.record_blacklisted_token.delay')
+    def test_add_and_contains(self, mock_record):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.store.add(self.user.id, self.token['jti'], str(self.token), self.token['exp'])
+        self.assertTrue(self.store.contains(self.token['jti']))
+        self.assertFalse(self.store.contains('other'))
+        self.assertFalse(BlacklistedToken.objects.exists())
+        mock_record.assert_called_once_with(self.user.id, self.token['jti'], str(self.token), self.token['exp'])
+
+    def test_expires_with_token(self):
+        with patch.object(cache, 'set') as mock_set:
+            self.store.add(self.user.id, self.token['jti'], str(self.token), int(time.time()) + 60)
+        self.assertAlmostEqual(mock_set.call_args.kwargs['timeout'], 60, delta=1)
+
+    def test_audit_task_writes_tables(self):
+        from {{cookiecutter.project_slug}}.users.tasks import record_blacklisted_token
+
+        record_blacklisted_token(self.user.id, self.token['jti'], str(self.token), self.token['exp'])
+        self.assertTrue(DatabaseBlacklistStore().contains(self.token['jti']))
+
+    def test_falls_back_to_database(self):
+        DatabaseBlacklistStore().add(self.user.id, self.token['jti'], str(self.token), self.token['exp'])
+        with patch.object(cache, 'get', side_effect=ConnectionError), self.assertLogs('{{cookiecutter.project_slug}}.utils.blacklist'):
+            self.assertTrue(self.store.contains(self.token['jti']))
+
+    @override_settings(JWT_BLACKLIST_STORE='{{cookiecutter.project_slug}}.utils.blacklist.CacheBlacklistStore')
+    def test_store_from_settings(self):
+        self.assertIsInstance(get_blacklist_store(), CacheBlacklistStore)
+
+
+class TestBloomFilter(APITestCase):
+    def test_membership(self):
+        bloom = BloomFilter(2 ** 16, 7)
+        values = [f'jti-{i}' for i in range(1000)]
+        for value in values:
+            bloom.add(value)
+        self.assertTrue(all(value in bloom for value in values))
+        false_positives = sum(f'other-{i}' in bloom for i in range(1000))
+        self.assertLess(false_positives, 20)
+{%- if cookiecutter.caches == 'redis' %}
+
+
+@override_settings(JWT_BLACKLIST_BLOOM={**settings.JWT_BLACKLIST_BLOOM, 'size': 2 ** 16, 'refresh': 0})
+class TestBloomCacheBlacklistStore(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = baker.make(User)
+        self.token = RefreshToken.for_user(self.user)
+
+    def test_shared_between_processes(self):
+        BloomCacheBlacklistStore().add(self.user.id, self.token['jti'], str(self.token), self.token['exp'])
+        self.assertTrue(BloomCacheBlacklistStore().contains(self.token['jti']))
+
+    def test_not_blacklisted_skips_cache(self):
+        store = BloomCacheBlacklistStore()
+        store.add(self.user.id, self.token['jti'], str(self.token), self.token['exp'])
+        with patch.object(cache, 'get') as mock_get:
+            self.assertFalse(store.contains('not-blacklisted'))
+        mock_get.assert_not_called()
+
+    def test_bloom_redis_down(self):
+        store = BloomCacheBlacklistStore()
+        store.redis = redis.Redis.from_url('redis://127.0.0.1:1')
+        with self.assertLogs('{{cookiecutter.project_slug}}.utils.blacklist'):
+            store.add(self.user.id, self.token['jti'], str(self.token), self.token['exp'])
+            # checked in the cache while the filter can't be synced
+            self.assertTrue(store.contains(self.token['jti']))
+
+    def test_bloom_write_failed(self):
+        store = BloomCacheBlacklistStore()
+        other = RefreshToken.for_user(self.user)
+        with patch.object(store.redis, 'pipeline', side_effect=redis.ConnectionError), \
+                self.assertLogs('{{cookiecutter.project_slug}}.utils.blacklist'):
+            store.add(self.user.id, self.token['jti'], str(self.token), self.token['exp'])
+        with patch.object(cache, 'get', return_value=None) as mock_get:
+            self.assertFalse(store.contains('not-blacklisted'))
+        mock_get.assert_called()
+        # the next add shares the failed token too
+        store.add(self.user.id, other['jti'], str(other), other['exp'])
+        with patch.object(cache, 'get') as mock_get:
+            self.assertFalse(store.contains('not-blacklisted'))
+        mock_get.assert_not_called()
+        with patch.object(cache, 'get', return_value=True):
+            self.assertTrue(BloomCacheBlacklistStore().contains(self.token['jti']))
+{%- endif %}
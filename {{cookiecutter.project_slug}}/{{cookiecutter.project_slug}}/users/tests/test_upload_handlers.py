@@ -0,0 +1,100 @@
+import os
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from model_bakery import baker
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from {{cookiecutter.project_slug}}.users.models import User, UserProfile
+from {{cookiecutter.project_slug}}.utils.bucket import Bucket
+from .test_bucket import BucketTestCase
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_data/images/test.png'), 'rb') as image:
+    PNG = image.read()
+
+
+@patch('{{cookiecutter.project_slug}}.users.views.make_avatar_renditions.delay_on_commit')
+class TestStreamedAvatarUpload(BucketTestCase, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = baker.make(User, is_active=True)
+        baker.make(UserProfile, owner=self.user)
+        self.url = reverse('users:user-profile', args=[self.user.id])
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + str(AccessToken.for_user(self.user)))
+        self.calls = []
+        Bucket().connection.meta.events.register('before-call.s3', lambda model, **kwargs: self.calls.append(model.name))
+
+    def upload(self, body=PNG, content_type='image/png', **data):
+        data['avatar'] = SimpleUploadedFile('avatar.png', body, content_type=content_type)
+        return self.client.patch(self.url, data)
+
+    def pending_uploads(self):
+        return self.s3.list_multipart_uploads(Bucket=settings.AWS_STORAGE_BUCKET_NAME).get('Uploads', [])
+
+    def test_partial_update_user_profile(self, mock_renditions):
+        response = self.upload(username='new_username')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['message'], 'Updated profile successfully.')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.username, 'new_username')
+        key = self.user.profile.avatar.name
+        self.assertTrue(key.startswith(f'avatars/{self.user.id}/') and key.endswith('.png'))
+        self.assertEqual(Bucket().get_object(key), PNG)
+        self.assertEqual(Bucket().head_object(key)['ContentType'], 'image/png')
+        self.assertEqual(self.calls.count('UploadPart'), 1)
+        mock_renditions.assert_called_once_with(self.user.profile.id)
+
+    @override_settings(AVATAR_MAX_SIZE=20 * 1024 * 1024)
+    def test_streamed_in_parts(self, mock_renditions):
+        body = PNG + bytes(2 * settings.AWS_S3_UPLOAD_PART_SIZE)
+        response = self.upload(body)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(Bucket().head_object(self.user.profile.avatar.name)['ContentLength'], len(body))
+        self.assertEqual(self.calls.count('UploadPart'), 3)
+
+    def test_not_an_image(self, mock_renditions):
+        response = self.upload(b'<?php echo "not an image"; ?>')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('not an image', response.data['errors']['avatar'][0])
+        self.assertNotIn('CreateMultipartUpload', self.calls)
+        self.assertEqual(self.keys(), set())
+        mock_renditions.assert_not_called()
+
+    def test_mismatched_content_type(self, mock_renditions):
+        response = self.upload(content_type='image/jpeg')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.keys(), set())
+
+    @override_settings(AVATAR_MAX_SIZE=100)
+    def test_too_large_is_aborted(self, mock_renditions):
+        response = self.upload()
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors']['avatar'][0], 'Ensure the file is at most 100 bytes.')
+        self.assertIn('AbortMultipartUpload', self.calls)
+        self.assertEqual(self.pending_uploads(), [])
+        self.user.profile.refresh_from_db()
+        self.assertFalse(self.user.profile.avatar)
+
+    def test_unexpected_field_is_skipped(self, mock_renditions):
+        response = self.client.patch(self.url, {'username': SimpleUploadedFile('a.png', PNG, content_type='image/png')})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors']['username'][0], 'No file was expected in this field.')
+        self.assertNotIn('CreateMultipartUpload', self.calls)
+        self.assertEqual(self.keys(), set())
+
+    @patch('{{cookiecutter.project_slug}}.users.tasks.delete_bucket_objects.delay_on_commit')
+    def test_invalid_update_discards_upload(self, mock_delete, mock_renditions):
+        baker.make(User, username='taken')
+        response = self.upload(username='taken')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        uploaded = mock_delete.call_args.args[0]
+        self.assertEqual(len(uploaded), 1)
+        self.assertTrue(uploaded[0].startswith(f'avatars/{self.user.id}/'))
+        self.user.profile.refresh_from_db()
+        self.assertFalse(self.user.profile.avatar)
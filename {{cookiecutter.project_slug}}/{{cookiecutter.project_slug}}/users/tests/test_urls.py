@@ -53,3 +53,15 @@ class TestUrls(APISimpleTestCase):
     def test_user_list_url(self):
         user_list_url = reverse('users:users-list')
         self.assertEqual(resolve(user_list_url).func.view_class, views.UsersListAPI)
+
+    def test_users_export_url(self):
+        users_export_url = reverse('users:users-export')
+        self.assertEqual(resolve(users_export_url).func.view_class, views.UsersExportAPI)
+
+    def test_avatar_upload_url(self):
+        avatar_upload_url = reverse('users:avatar-upload')
+        self.assertEqual(resolve(avatar_upload_url).func.view_class, views.AvatarUploadAPI)
+
+    def test_avatar_confirm_url(self):
+        avatar_confirm_url = reverse('users:avatar-confirm')
+        self.assertEqual(resolve(avatar_confirm_url).func.view_class, views.AvatarConfirmAPI)
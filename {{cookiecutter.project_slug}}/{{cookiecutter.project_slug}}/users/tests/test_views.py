@@ -1,13 +1,15 @@
-import os
+import csv
+import json
 from datetime import timedelta, datetime
 from unittest.mock import patch
 from urllib.parse import urlencode
 
 import jwt
 from django.conf import settings
-from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
 from django.shortcuts import Http404
 from django.urls import reverse
+from django.utils import timezone
 from model_bakery import baker
 from rest_framework import status
 from rest_framework.test import APIRequestFactory, APITestCase
@@ -15,8 +17,10 @@ from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from {{cookiecutter.project_slug}}.users.models import User, UserProfile
-from {{cookiecutter.project_slug}}.users.views import UsersListAPI
+from {{cookiecutter.project_slug}}.users.tasks import send_verification_email
+from {{cookiecutter.project_slug}}.users.views import UsersListAPI, UsersExportAPI
 from {{cookiecutter.project_slug}}.utils import JWT_token
+from {{cookiecutter.project_slug}}.utils.enqueue import enqueue_key
 
 
 class TestUsersListAPI(APITestCase):
@@ -25,6 +29,7 @@ class TestUsersListAPI(APITestCase):
         baker.make(User, 34)
 
     def setUp(self):
+        cache.clear()
         self.factory = APIRequestFactory()
         self.user = baker.make(User, username='username', email='email@gmail.com', password='password', is_active=True)
         self.not_active_user = baker.make(User, username='not_active', email='not_active@gmail.com',
@@ -53,6 +58,188 @@ class TestUsersListAPI(APITestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.data['data']), 10)
 
+    def test_list_cursor_GET(self):
+        request = self.factory.get(f"{self.url}?{urlencode({'pagination': 'cursor'})}",
+                                   HTTP_AUTHORIZATION='Bearer ' + self.admin_token)
+        response = UsersListAPI.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['data']), 10)
+        self.assertNotIn('items_count', response.data['pagination'])
+        request = self.factory.get(response.data['pagination']['next_page'],
+                                   HTTP_AUTHORIZATION='Bearer ' + self.admin_token)
+        response = UsersListAPI.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['data']), 10)
+        self.assertTrue(response.data['pagination']['has_previous'])
+
+    def test_list_limit_GET(self):
+        request = self.factory.get(f"{self.url}?{urlencode({'limit': 5})}",
+                                   HTTP_AUTHORIZATION='Bearer ' + self.admin_token)
+        response = UsersListAPI.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['data']), 5)
+
+    def test_list_cursor_walks_every_user_once(self):
+        emails = []
+        url = f"{self.url}?{urlencode({'pagination': 'cursor', 'limit': 20})}"
+        while url:
+            request = self.factory.get(url, HTTP_AUTHORIZATION='Bearer ' + self.admin_token)
+            response = UsersListAPI.as_view()(request)
+            emails += [user['email'] for user in response.data['data']]
+            url = response.data['pagination']['next_page']
+        self.assertEqual(emails, list(User.objects.order_by('email', 'id').values_list('email', flat=True)))
+
+    def test_list_query_count(self):
+        users = list(User.objects.all())
+        group = baker.make('auth.Group')
+        for user in users:
+            user.groups.add(group)
+            baker.make(UserProfile, owner=user)
+        # resolves the authenticated user once, later requests find it cached
+        UsersListAPI.as_view()(self.factory.get(self.url, HTTP_AUTHORIZATION='Bearer ' + self.admin_token))
+        for limit in (1, 5, 20):
+            request = self.factory.get(f"{self.url}?{urlencode({'pagination': 'cursor', 'limit': limit})}",
+                                       HTTP_AUTHORIZATION='Bearer ' + self.admin_token)
+            # page, groups, user_permissions
+            with self.assertNumQueries(3):
+                response = UsersListAPI.as_view()(request)
+                self.assertEqual(len(response.data['data']), limit)
+
+    def test_list_invalid_cursor(self):
+        request = self.factory.get(f"{self.url}?{urlencode({'cursor': 'invalid'})}",
+                                   HTTP_AUTHORIZATION='Bearer ' + self.admin_token)
+        response = UsersListAPI.as_view()(request)
+        self.assertEqual(response.status_code, 404)
+{%- if cookiecutter.caches == 'redis' %}
+
+
+class TestUsersListCache(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        baker.make(User, 5)
+        cls.admin = baker.make(User, username='admin', email='admin@gmail.com', is_active=True, is_admin=True)
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.admin_token = str(AccessToken.for_user(self.admin))
+        self.url = reverse('users:users-list')
+
+    def get(self, query=''):
+        request = self.factory.get(f'{self.url}{query}', HTTP_AUTHORIZATION='Bearer ' + self.admin_token)
+        return UsersListAPI.as_view()(request)
+
+    def test_cached_response(self):
+        response = self.get()
+        # the authenticated user is cached as well
+        with self.assertNumQueries(0):
+            cached_response = self.get()
+        self.assertEqual(cached_response.data, response.data)
+
+    def test_canonical_query_string(self):
+        self.get('?is_active=true&limit=3')
+        with self.assertNumQueries(0):
+            response = self.get('?limit=3&is_active=true')
+        self.assertEqual(len(response.data['data']), 1)
+
+    def test_invalidated_on_user_save(self):
+        self.get()
+        user = User.objects.exclude(id=self.admin.id).first()
+        user.username = 'updated_username'
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        response = self.get()
+        self.assertIn('updated_username', [user['username'] for user in response.data['data']])
+
+    def test_invalidated_on_profile_save(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            baker.make(UserProfile, owner=self.admin, bio='new bio')
+        response = self.get()
+        self.assertIn('new bio', [user['bio'] for user in response.data['data']])
+
+    def test_not_modified(self):
+        etag = self.get()['ETag']
+        request = self.factory.get(self.url, HTTP_AUTHORIZATION='Bearer ' + self.admin_token, HTTP_IF_NONE_MATCH=etag)
+        response = UsersListAPI.as_view()(request)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.exclude(id=self.admin.id).first().delete()
+        response = UsersListAPI.as_view()(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_invalidated_on_user_delete(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.exclude(id=self.admin.id).first().delete()
+        response = self.get()
+        self.assertEqual(len(response.data['data']), 5)
+
+    def test_invalidated_after_commit(self):
+        self.get()
+        user = User.objects.exclude(id=self.admin.id).first()
+        user.username = 'renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+            # a request served before the commit still gets the cached list
+            with self.assertNumQueries(0):
+                self.get()
+        self.assertIn('renamed', [user['username'] for user in self.get().data['data']])
+{%- endif %}
+
+
+class TestUsersExportAPI(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        baker.make(User, 34)
+        cls.user = baker.make(User, username='username', email='email@gmail.com', is_active=True)
+        cls.admin = baker.make(User, username='admin', email='admin@gmail.com', is_active=True, is_admin=True)
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.admin_token = str(AccessToken.for_user(self.admin))
+        self.url = reverse('users:users-export')
+
+    def export(self, **params):
+        request = self.factory.get(f'{self.url}?{urlencode(params)}', HTTP_AUTHORIZATION='Bearer ' + self.admin_token)
+        response = UsersExportAPI.as_view()(request)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_permission_denied(self):
+        token = str(AccessToken.for_user(self.user))
+        request = self.factory.get(self.url, HTTP_AUTHORIZATION='Bearer ' + token)
+        response = UsersExportAPI.as_view()(request)
+        self.assertEqual(response.status_code, 403)
+
+    def test_export_ndjson(self):
+        response, content = self.export()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 36)
+        self.assertEqual(rows[0]['email'], User.objects.first().email)
+
+    def test_export_csv(self):
+        response, content = self.export(export_format='csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(content.splitlines()))
+        self.assertEqual(len(rows), 36)
+        self.assertIn('username', rows[0])
+
+    def test_export_filter_and_search(self):
+        _, content = self.export(is_admin=True)
+        self.assertEqual(len(content.splitlines()), 1)
+        _, content = self.export(search='email@gmail')
+        self.assertEqual(json.loads(content)['username'], 'username')
+
+    def test_invalid_export_format(self):
+        request = self.factory.get(f"{self.url}?{urlencode({'export_format': 'xml'})}",
+                                   HTTP_AUTHORIZATION='Bearer ' + self.admin_token)
+        response = UsersExportAPI.as_view()(request)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('export_format', response.data['errors'])
+
 
 class TestUserRegisterAPI(APITestCase):
     @classmethod
@@ -87,6 +274,17 @@ class TestUserRegisterAPI(APITestCase):
         self.assertIn('errors', response.data)
         self.assertIn('username', response.data['errors'])
 
+    @patch('{{cookiecutter.project_slug}}.users.views.send_verification_email.delay')
+    def test_not_unique_email_case_insensitive(self, mock_send_email_task):
+        User.objects.filter(username='username').update(email='kevin@example.com')
+        self.valid_data['email'] = 'Kevin@Example.com'
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, data=self.valid_data)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors']['email'][0], 'user with this email already exists.')
+        mock_send_email_task.assert_not_called()
+        self.assertEqual(User.objects.all().count(), 1)
+
     def test_mismatch_password(self):
         self.invalid_data['password'] = '<PASSWORD>'
         self.invalid_data['username'] = 'testuser'
@@ -129,9 +327,41 @@ class TestUserRegisterVerificationAPI(APITestCase):
         self.assertIn('message', response.data)
         self.assertEqual(response.data['message'], 'this account already is active.')
 
-    @patch('{{cookiecutter.project_slug}}.users.views.JWT_token.get_object_or_404')
-    def test_activation_url_invalid(self, mock_jwt_decode_token):
-        mock_jwt_decode_token.side_effect = Http404
+    def test_account_activation_query_count(self):
+        modified = self.user.modified
+        # the conditional UPDATE only
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url.replace('invalid_token', self.token))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertGreater(self.user.modified, modified)
+
+    def test_repeated_activation_skips_database(self):
+        self.client.get(self.url.replace('invalid_token', self.token))
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url.replace('invalid_token', self.token))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_activation_without_cache(self):
+        url = self.url.replace('invalid_token', self.token)
+        with patch('{{cookiecutter.project_slug}}.users.services.cache.get', side_effect=ConnectionError), \
+                patch('{{cookiecutter.project_slug}}.users.services.cache.set', side_effect=ConnectionError), \
+                self.assertLogs('{{cookiecutter.project_slug}}.users.services', 'WARNING'):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_409_CONFLICT)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+
+    def test_activation_token_of_previous_email(self):
+        self.user.email = 'new@gmail.com'
+        self.user.save()
+        response = self.client.get(self.url.replace('invalid_token', self.token))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+    def test_activation_url_invalid(self):
+        self.user.delete()
         response = self.client.get(self.url.replace('invalid_token', self.token))
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         self.assertIn('error', response.data)
@@ -164,6 +394,16 @@ class TestResendVerificationEmailAPI(APITestCase):
         self.assertIn('message', response.data)
         self.assertEqual(response.data['message'], 'We`ve resent the activation link to your email.')
 
+    @patch('{{cookiecutter.project_slug}}.users.views.send_verification_email.delay')
+    def test_repeated_requests_enqueue_once(self, mock_send_email_task):
+        cache.delete(enqueue_key(send_verification_email, f'{self.user.id}:verification'))
+        for _ in range(3):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(self.url, data={'email': 'email@gmail.com'})
+            self.assertEqual(response.status_code, 202)
+        mock_send_email_task.assert_called_once_with('email@gmail.com', self.user.id, 'verification',
+                                                     'Verification URL from AskTech')
+
     @patch('{{cookiecutter.project_slug}}.utils.send_email.send_link')
     def test_invalid_email(self, mock_send_email):
         data = {'email': 'does_not_exists_user_email@gmail.com'}
@@ -250,6 +490,19 @@ class TestResetPasswordAPI(APITestCase):
         self.assertEqual(response.status_code, 202)
         self.assertEqual(response.data['message'], 'A password reset link has been sent to your email.')
 
+    @patch('{{cookiecutter.project_slug}}.users.views.send_verification_email.delay')
+    def test_repeated_requests_enqueue_once(self, mock_send_email_task):
+        cache.delete(enqueue_key(send_verification_email, f'{self.user.id}:reset_password'))
+        for _ in range(3):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(self.url, data={'email': 'email@gmail.com'})
+            self.assertEqual(response.status_code, 202)
+        mock_send_email_task.assert_called_once()
+
+    def test_reset_email_case_insensitive(self):
+        response = self.client.post(self.url, data={'email': 'EMAIL@gmail.com'})
+        self.assertEqual(response.status_code, 202)
+
     def test_invalid_email(self):
         data = {'email': 'invalidemail@gmail.com'}
         response = self.client.post(self.url, data=data)
@@ -264,7 +517,7 @@ class TestBlockTokenAPI(APITestCase):
         self.invalid_token = 'invalid.token.alksdjfadffeygfhasjf'
         self.url = reverse('users:token-block')
 
-    @patch('rest_framework_simplejwt.tokens.BlacklistMixin.blacklist')
+    @patch('{{cookiecutter.project_slug}}.utils.tokens.RefreshToken.blacklist')
     def test_successful_block_token(self, mock_black_list):
         data = {'refresh': self.token}
         response = self.client.post(self.url, data)
@@ -291,32 +544,71 @@ class TestUserProfileAPI(APITestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data['username'], self.user.username)
 
+    def test_retrieve_user_profile_query_count(self):
+        url = reverse('users:user-profile', args=[self.user.id])
+        # validator, user with profile, groups, user_permissions
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_retrieve_own_profile_query_count(self):
+        url = reverse('users:user-profile', args=[self.user.id])
+        self.client.get(url, HTTP_AUTHORIZATION='Bearer ' + self.token)
+        # only the validator, the profile comes from the cached authenticated user
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_AUTHORIZATION='Bearer ' + self.token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['username'], self.user.username)
+
+    def test_retrieve_own_profile_outdated_cache(self):
+        url = reverse('users:user-profile', args=[self.user.id])
+        self.client.get(url, HTTP_AUTHORIZATION='Bearer ' + self.token)
+        # a change made without signals, as by another process before the local cache expires
+        User.objects.filter(id=self.user.id).update(username='changed', modified=timezone.now())
+        response = self.client.get(url, HTTP_AUTHORIZATION='Bearer ' + self.token)
+        self.assertEqual(response.data['username'], 'changed')
+
+    def test_retrieve_user_profile_not_modified(self):
+        url = reverse('users:user-profile', args=[self.user.id])
+        response = self.client.get(url)
+        self.assertIn('ETag', response.headers)
+        self.assertIn('Last-Modified', response.headers)
+        with self.assertNumQueries(1):
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified.content, b'')
+        not_modified = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_retrieve_user_profile_modified(self):
+        url = reverse('users:user-profile', args=[self.user.id])
+        etag = self.client.get(url)['ETag']
+        self.user.profile.bio = 'new bio'
+        self.user.profile.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['bio'], 'new bio')
+
+    def test_partial_update_if_match(self):
+        url = reverse('users:user-profile', args=[self.user.id])
+        etag = self.client.get(url)['ETag']
+        response = self.client.patch(url, {'bio': 'first'}, HTTP_AUTHORIZATION='Bearer ' + self.token,
+                                     HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        response = self.client.patch(url, {'bio': 'lost update'}, HTTP_AUTHORIZATION='Bearer ' + self.token,
+                                     HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.bio, 'first')
+
     def test_retrieve_user_profile_not_found(self):
         url = reverse('users:user-profile', args=[23])
         response = self.client.get(url)
         self.assertEqual(response.status_code, 404)
         self.assertEqual(response.data['detail'], 'No User matches the given query.')
 
-    @patch('storages.backends.s3boto3.S3Boto3Storage.save', return_value='test/avatar.png')
-    def test_partial_update_user_profile(self, mock_save):
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        image_path = os.path.join(base_dir, 'test_data/images/test.png')
-
-        with open(image_path, 'rb') as image:
-            avatar = SimpleUploadedFile(
-                'avatar.png',
-                image.read(),
-                content_type='image/png'
-            )
-        data = {'username': 'new_username', 'avatar': avatar}
-        url = reverse('users:user-profile', args=[self.user.id])
-        response = self.client.patch(url, data, HTTP_AUTHORIZATION='Bearer ' + self.token)
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['message'], 'Updated profile successfully.')
-        self.user.refresh_from_db()
-        self.assertEqual(self.user.username, 'new_username')
-        self.assertTrue(self.user.profile.avatar.name.endswith('avatar.png'))
-
     @patch('{{cookiecutter.project_slug}}.users.views.send_verification_email.delay_on_commit')
     def test_update_email(self, mock_send_email_task):
         data = {'email': 'email@email.com'}
@@ -328,9 +620,29 @@ class TestUserProfileAPI(APITestCase):
         self.assertFalse(self.user.is_active)
         self.assertEqual(self.user.email, 'email@email.com')
 
-    @patch('{{cookiecutter.project_slug}}.users.views.Bucket.delete_object')
+    @patch('{{cookiecutter.project_slug}}.users.views.send_verification_email.delay_on_commit')
+    def test_update_email_taken(self, mock_send_email_task):
+        baker.make(User, email='taken@email.com')
+        url = reverse('users:user-profile', args=[self.user.id])
+        response = self.client.patch(url, {'email': 'Taken@email.com'}, HTTP_AUTHORIZATION='Bearer ' + self.token)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors']['email'][0], 'user with this email already exists.')
+        mock_send_email_task.assert_not_called()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+
+    @patch('{{cookiecutter.project_slug}}.users.tasks.delete_bucket_objects.delay_on_commit')
     def test_delete_account(self, mock_delete_avatar):
         url = reverse('users:user-profile', args=[self.user.id])
         response = self.client.delete(url, HTTP_AUTHORIZATION='Bearer ' + self.token)
         self.assertEqual(response.status_code, 204)
         self.assertNotIn(self.user, User.objects.all())
+        mock_delete_avatar.assert_not_called()
+
+    @patch('{{cookiecutter.project_slug}}.users.tasks.delete_bucket_objects.delay_on_commit')
+    def test_delete_account_deletes_avatar_async(self, mock_delete_avatar):
+        UserProfile.objects.filter(owner=self.user).update(avatar='avatars/kevin.png')
+        url = reverse('users:user-profile', args=[self.user.id])
+        response = self.client.delete(url, HTTP_AUTHORIZATION='Bearer ' + self.token)
+        self.assertEqual(response.status_code, 204)
+        mock_delete_avatar.assert_called_once_with(['avatars/kevin.png'])
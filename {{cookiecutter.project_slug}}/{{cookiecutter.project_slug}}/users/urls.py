@@ -19,10 +19,13 @@ password = [
 
 urlpatterns = [
     path('', views.UsersListAPI.as_view(), name='users-list'),
+    path('export/', views.UsersExportAPI.as_view(), name='users-export'),
     path('register/', views.UserRegisterAPI.as_view(), name='user-register'),
     path('register/verify/<str:token>/', views.UserRegisterVerifyAPI.as_view(), name='user-register-verify'),
     path('resend-email/', views.ResendVerificationEmailAPI.as_view(), name='user-register-resend-email'),
     path('profile/<int:id>/', views.UserProfileAPI.as_view(), name='user-profile'),
+    path('profile/avatar/upload/', views.AvatarUploadAPI.as_view(), name='avatar-upload'),
+    path('profile/avatar/confirm/', views.AvatarConfirmAPI.as_view(), name='avatar-confirm'),
     path('token/', include(token)),
     path('password/', include(password))
 ]
@@ -1,22 +1,40 @@
-from drf_spectacular.utils import extend_schema, extend_schema_view
+from hashlib import md5
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.http import quote_etag
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import ListAPIView, CreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken, TokenError
+from rest_framework_simplejwt.exceptions import TokenError
 
 from {{cookiecutter.project_slug}}.docs.serializers.doc_serializers import MessageSerializer
 from {{cookiecutter.project_slug}}.permissions import permissions
+from {{cookiecutter.project_slug}}.search.filters import IndexedSearchFilter
 from {{cookiecutter.project_slug}}.utils import JWT_token
-from {{cookiecutter.project_slug}}.utils.bucket import Bucket
+from {{cookiecutter.project_slug}}.utils.bucket import Bucket, delete_objects_async
+{%- if cookiecutter.caches == 'redis' %}
+from {{cookiecutter.project_slug}}.utils.cache import CachedListMixin
+{%- endif %}
+from {{cookiecutter.project_slug}}.utils.conditional import conditional
+from {{cookiecutter.project_slug}}.utils.enqueue import delay_once_on_commit
+from {{cookiecutter.project_slug}}.utils.export import ndjson_rows, csv_rows
+from {{cookiecutter.project_slug}}.utils.mixins import EagerLoadingMixin
+from {{cookiecutter.project_slug}}.utils.paginators import NeatModePagination
+from {{cookiecutter.project_slug}}.utils.tokens import RefreshToken
+from {{cookiecutter.project_slug}}.utils.upload_handlers import S3MultipartImageUploadHandler
 from . import serializers
-from .models import User
-from .services import register
-from .tasks import send_verification_email
+from .models import User, UserProfile
+from .services import activate, attach_avatar, new_avatar_key
+from .tasks import make_avatar_renditions, send_verification_email
 
 
-class UsersListAPI(ListAPIView):
+class UsersListAPI({% if cookiecutter.caches == 'redis' %}CachedListMixin, {% endif %}EagerLoadingMixin, ListAPIView):
     """
     Returns list of users.\n
     allowed methods: GET.
@@ -24,8 +42,56 @@ class UsersListAPI(ListAPIView):
     permission_classes = [IsAdminUser, ]
     queryset = User.objects.all()
     serializer_class = serializers.UserSerializer
+    pagination_class = NeatModePagination
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter]
     filterset_fields = ['last_login', 'is_active', 'is_admin', 'is_superuser']
     search_fields = ['username', 'email']
+{%- if cookiecutter.caches == 'redis' %}
+    cache_models = (User, UserProfile)
+
+    @conditional
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+{%- endif %}
+
+
+class UsersExportAPI(UsersListAPI):
+    """
+    Streams the whole filtered list of users as NDJSON or CSV.\n
+    accepts the same filter and search parameters as the users list.\n
+    allowed methods: GET.
+    """
+    pagination_class = None
+    chunk_size = 2000
+    export_formats = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv',
+    }
+
+    @extend_schema(
+        parameters=[OpenApiParameter('export_format', enum=list(export_formats), default='ndjson')],
+        responses={(200, 'application/x-ndjson'): serializers.UserSerializer, (200, 'text/csv'): str},
+    )
+    def get(self, request, *args, **kwargs):
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in self.export_formats:
+            return Response(
+                data={'errors': {'export_format': f'Must be one of {", ".join(self.export_formats)}.'}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+
+        def serialize(user):
+            return serializer.to_representation(user)
+
+        if export_format == 'csv':
+            rows = csv_rows(queryset, serialize, list(serializer.fields), self.chunk_size)
+        else:
+            rows = ndjson_rows(queryset, serialize, self.chunk_size)
+        response = StreamingHttpResponse(rows, content_type=self.export_formats[export_format])
+        response['Content-Disposition'] = f'attachment; filename="users.{export_format}"'
+        return response
 
 
 class UserRegisterAPI(CreateAPIView):
@@ -41,10 +107,12 @@ class UserRegisterAPI(CreateAPIView):
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data)
         if serializer.is_valid():
-            vd = serializer.validated_data
-            user = register(username=vd['username'], email=vd['email'], password=vd['password'])
-            send_verification_email.delay_on_commit(vd['email'], user.id, 'verification',
-                                                    'Verification URL from AskTech')
+            try:
+                user = serializer.save()
+            except ValidationError as e:
+                return Response(data={'errors': e.detail}, status=status.HTTP_400_BAD_REQUEST)
+            delay_once_on_commit(send_verification_email, f'{user.id}:verification', settings.EMAIL_DEDUPE_WINDOW,
+                                 user.email, user.id, 'verification', 'Verification URL from AskTech')
             return Response(
                 data={'data': {'message': 'We`ve sent you an activation link via email.'}},
                 status=status.HTTP_201_CREATED,
@@ -65,13 +133,14 @@ class UserRegisterVerifyAPI(APIView):
     serializer_class = MessageSerializer
 
     def get(self, request, token):
-        token_result: User = JWT_token.get_user(token)
-        if not isinstance(token_result, User):
-            return token_result
-        if token_result.is_active:
+        payload = JWT_token.get_payload(token)
+        if isinstance(payload, Response):
+            return payload
+        activated = activate(payload=payload)
+        if activated is None:
+            return Response(data={'error': 'Activation URL is invalid'}, status=status.HTTP_404_NOT_FOUND)
+        if not activated:
             return Response(data={'message': 'this account already is active.'}, status=status.HTTP_409_CONFLICT)
-        token_result.is_active = True
-        token_result.save()
         return Response(
             data={'message': 'Account activated successfully.'},
             status=status.HTTP_200_OK
@@ -91,8 +160,8 @@ class ResendVerificationEmailAPI(APIView):
         srz_data = self.serializer_class(data=request.data)
         if srz_data.is_valid():
             user: User = srz_data.validated_data['user']
-            send_verification_email.delay_on_commit(user.email, user.id, 'verification',
-                                                    'Verification URL from AskTech')
+            delay_once_on_commit(send_verification_email, f'{user.id}:verification', settings.EMAIL_DEDUPE_WINDOW,
+                                 user.email, user.id, 'verification', 'Verification URL from AskTech')
             return Response(
                 data={"message": "We`ve resent the activation link to your email."},
                 status=status.HTTP_202_ACCEPTED,
@@ -161,10 +230,11 @@ class ResetPasswordAPI(APIView):
         srz_data = self.serializer_class(data=request.data)
         if srz_data.is_valid():
             try:
-                user: User = User.objects.get(email=srz_data.validated_data['email'])
+                user: User = User.objects.get_by_email(srz_data.validated_data['email'])
             except User.DoesNotExist:
                 return Response(data={'errors': 'user with this Email not found.'}, status=status.HTTP_404_NOT_FOUND)
-            send_verification_email.delay_on_commit(user.email, user.id, 'reset_password', 'Reset Password Link:')
+            delay_once_on_commit(send_verification_email, f'{user.id}:reset_password', settings.EMAIL_DEDUPE_WINDOW,
+                                 user.email, user.id, 'reset_password', 'Reset Password Link:')
             return Response(
                 data={'message': 'A password reset link has been sent to your email.'},
                 status=status.HTTP_202_ACCEPTED
@@ -201,7 +271,7 @@ class BlockTokenAPI(APIView):
         responses={200: MessageSerializer}
     ),
 )
-class UserProfileAPI(RetrieveUpdateDestroyAPIView):
+class UserProfileAPI(EagerLoadingMixin, RetrieveUpdateDestroyAPIView):
     """
     Retrieve, update, or delete user profile.
     Allowed methods: GET, PATCH, DELETE.
@@ -216,26 +286,119 @@ class UserProfileAPI(RetrieveUpdateDestroyAPIView):
     queryset = User.objects.filter(is_active=True)
     http_method_names = ['get', 'patch', 'delete']
 
+    def get_validator(self):
+        """ETag and Last-Modified of the profile, read without loading the user."""
+        row = self.validator_row = self.queryset.filter(id=self.kwargs[self.lookup_url_kwarg]).values_list(
+            'modified', 'last_login', 'profile__modified'
+        ).first()
+        if row is None:
+            return None, None
+        timestamps = [moment.timestamp() for moment in row if moment is not None]
+        etag = md5(f'{self.kwargs[self.lookup_url_kwarg]}:{timestamps}'.encode()).hexdigest()
+        return quote_etag(etag), int(max(timestamps))
+
+    def get_object(self):
+        """Reuses the authenticated user, already loaded with its relations, when it is the one looked up."""
+        user = self.request.user
+        if user.is_authenticated and user.is_active and str(user.pk) == str(self.kwargs[self.lookup_url_kwarg]):
+            profile = getattr(user, 'profile', None)
+            row = (user.modified, user.last_login, profile.modified if profile else None)
+            # the validator row, when read, tells whether the cached user is outdated
+            if getattr(self, 'validator_row', row) == row:
+                self.check_object_permissions(self.request, user)
+                return user
+        return super().get_object()
+
+    @conditional
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def initialize_request(self, request, *args, **kwargs):
+        # multipart avatars are streamed to the bucket while the body is parsed
+        self.upload_handler = S3MultipartImageUploadHandler(
+            request,
+            key_for=lambda content_type: new_avatar_key(user=request.user, content_type=content_type),
+            content_types=settings.AVATAR_CONTENT_TYPES,
+            max_size=settings.AVATAR_MAX_SIZE,
+            field_names=('avatar',),
+        )
+        request.upload_handlers = [self.upload_handler]
+        return super().initialize_request(request, *args, **kwargs)
+
+    @conditional
     def patch(self, request, *args, **kwargs):
         user: User = self.get_object()
         serializer = self.get_serializer(instance=user, data=request.data, partial=True)
+        if self.upload_handler.rejected:
+            self.upload_handler.discard()
+            return Response(data={'errors': self.upload_handler.rejected}, status=status.HTTP_400_BAD_REQUEST)
         if serializer.is_valid():
             email_changed = 'email' in serializer.validated_data
             message = 'Updated profile successfully.'
             if email_changed:
+                # saved together with the new email by serializer.save()
                 user.is_active = False
-                user.save()
+
+            try:
+                serializer.save()
+            except ValidationError as e:
+                self.upload_handler.discard()
+                return Response(data={'errors': e.detail}, status=status.HTTP_400_BAD_REQUEST)
+
+            if serializer.validated_data.get('profile', {}).get('avatar'):
+                make_avatar_renditions.delay_on_commit(user.profile.id)
+
+            if email_changed:
                 send_verification_email.delay_on_commit(serializer.validated_data['email'], user.id, 'verification',
                                                         'Verification URL from AskTech.')
                 message += ' A verification link has been sent to your new email address.'
 
-            serializer.save()
-
             return Response(data={'message': message}, status=status.HTTP_200_OK)
+        self.upload_handler.discard()
         return Response(data={'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
     def destroy(self, request, *args, **kwargs):
         user: User = self.get_object()
         if user.profile.avatar:
-            Bucket().delete_object(self.get_object().profile.avatar.name)
-        return super().destroy(request, *args, **kwargs)
+            delete_objects_async([user.profile.avatar.name])
+        self.perform_destroy(user)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class AvatarUploadAPI(APIView):
+    """
+    Issues a presigned POST the client uploads its avatar to the bucket with, then confirms it.\n
+    allowed methods: POST.
+    """
+    permission_classes = [IsAuthenticated, ]
+    serializer_class = serializers.AvatarUploadSerializer
+
+    @extend_schema(responses={201: serializers.AvatarUploadResponseSerializer})
+    def post(self, request):
+        srz_data = self.serializer_class(data=request.data)
+        if srz_data.is_valid():
+            content_type = srz_data.validated_data['content_type']
+            key = new_avatar_key(user=request.user, content_type=content_type)
+            upload = Bucket().presigned_post(key, content_type, settings.AVATAR_MAX_SIZE,
+                                             settings.AVATAR_UPLOAD_EXPIRES)
+            return Response(data={**upload, 'key': key}, status=status.HTTP_201_CREATED)
+        return Response(data={'errors': srz_data.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AvatarConfirmAPI(APIView):
+    """
+    Sets an avatar uploaded with a presigned POST on the user's profile.\n
+    allowed methods: POST.
+    """
+    permission_classes = [IsAuthenticated, ]
+    serializer_class = serializers.AvatarConfirmSerializer
+
+    @extend_schema(responses={200: MessageSerializer})
+    def post(self, request):
+        srz_data = self.serializer_class(data=request.data, context={'user': request.user})
+        if srz_data.is_valid():
+            profile = UserProfile.objects.get(owner=request.user)
+            attach_avatar(profile=profile, key=srz_data.validated_data['key'])
+            make_avatar_renditions.delay_on_commit(profile.id)
+            return Response(data={'message': 'Avatar updated successfully.'}, status=status.HTTP_200_OK)
+        return Response(data={'errors': srz_data.errors}, status=status.HTTP_400_BAD_REQUEST)
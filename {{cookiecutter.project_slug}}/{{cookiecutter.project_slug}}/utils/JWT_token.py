@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta
+from uuid import uuid4
 
 import jwt
 from django.conf import settings
@@ -15,12 +16,22 @@ def generate_activation_token(user, lifetime: timedelta = None):
     payload = {
         'user_id': user.id,
         'email': user.email,
+        'jti': uuid4().hex,
         'exp': datetime.now(tz=timezone('Asia/Tehran')) + lifetime if lifetime is not None else timedelta(minutes=5)
     }
     token = jwt.encode(payload, settings.SECRET_KEY, algorithm='HS256')
     return token
 
 
+def get_payload(token):
+    try:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
+    except jwt.ExpiredSignatureError:
+        return Response(data={'error': 'Activation link has expired!'}, status=status.HTTP_400_BAD_REQUEST)
+    except jwt.InvalidTokenError:
+        return Response(data={'error': 'Activation link is invalid!'}, status=status.HTTP_400_BAD_REQUEST)
+
+
 def get_user(token):
     try:
         decoded_data = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
@@ -0,0 +1,116 @@
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+logger = logging.getLogger(__name__)
+
+
+class UserCache:
+    """
+    Users by id, with their profile, groups and permissions loaded.
+    Kept pickled in a small per-process LRU for AUTH_USER_CACHE['local_timeout'] seconds,
+    and in the cache for AUTH_USER_CACHE['timeout'] seconds when that is set.
+    """
+
+    def __init__(self):
+        self.local = OrderedDict()
+        self.lock = threading.Lock()
+
+    def key(self, user_id) -> str:
+        return f'auth_user:{user_id}'
+
+    def get(self, user_id):
+        options = settings.AUTH_USER_CACHE
+        with self.lock:
+            entry = self.local.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self.local.move_to_end(user_id)
+                return pickle.loads(entry[1])
+        if not options['timeout']:
+            return None
+        try:
+            data = cache.get(self.key(user_id))
+        except Exception:
+            logger.warning('user cache is unavailable')
+            return None
+        if data is None:
+            return None
+        self.remember(user_id, data)
+        return pickle.loads(data)
+
+    def set(self, user):
+        data = pickle.dumps(user)
+        self.remember(user.pk, data)
+        if settings.AUTH_USER_CACHE['timeout']:
+            try:
+                cache.set(self.key(user.pk), data, timeout=settings.AUTH_USER_CACHE['timeout'])
+            except Exception:
+                logger.warning('user cache is unavailable')
+
+    def remember(self, user_id, data: bytes):
+        options = settings.AUTH_USER_CACHE
+        with self.lock:
+            self.local[user_id] = (time.monotonic() + options['local_timeout'], data)
+            self.local.move_to_end(user_id)
+            while len(self.local) > options['maxsize']:
+                self.local.popitem(last=False)
+
+    def invalidate(self, *user_ids):
+        self.forget(user_ids)
+        # again after commit, a concurrent request may have cached the old row in between
+        transaction.on_commit(lambda: self.forget(user_ids))
+
+    def forget(self, user_ids):
+        with self.lock:
+            for user_id in user_ids:
+                self.local.pop(user_id, None)
+        if settings.AUTH_USER_CACHE['timeout']:
+            try:
+                cache.delete_many([self.key(user_id) for user_id in user_ids])
+            except Exception:
+                logger.warning('could not invalidate cached users')
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves users through `user_cache` instead of a query per request."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        user = user_cache.get(user_id)
+        if user is None:
+            user_model = get_user_model()
+            try:
+                user = user_model.objects.select_related('profile').prefetch_related(
+                    'groups', 'user_permissions'
+                ).get(**{api_settings.USER_ID_FIELD: user_id})
+            except user_model.DoesNotExist:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found')
+            user_cache.set(user)
+
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        return user
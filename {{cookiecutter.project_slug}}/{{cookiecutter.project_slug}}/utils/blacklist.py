@@ -0,0 +1,168 @@
+import logging
+{%- if cookiecutter.caches == 'redis' %}
+import threading
+{%- endif %}
+import time
+from hashlib import blake2b
+
+{% if cookiecutter.caches == 'redis' -%}
+import redis
+{% endif -%}
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseBlacklistStore:
+    """simplejwt's own blacklist: the outstanding and blacklisted token tables."""
+
+    def add(self, user_id, jti: str, token: str, exp: int):
+        outstanding, _ = OutstandingToken.objects.get_or_create(
+            jti=jti,
+            defaults={'user_id': user_id, 'token': token, 'expires_at': datetime_from_epoch(exp)}
+        )
+        BlacklistedToken.objects.get_or_create(token=outstanding)
+
+    def contains(self, jti: str) -> bool:
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+class CacheBlacklistStore(DatabaseBlacklistStore):
+    """
+    Keeps blacklisted JTIs in the cache until their token expires.
+    The SQL tables are written by a celery task, for auditing only, so an entry the cache evicts is no longer
+    checked: only DatabaseBlacklistStore is durable.
+    """
+
+    def key(self, jti: str) -> str:
+        return f'jwt_blacklist:{jti}'
+
+    def add(self, user_id, jti: str, token: str, exp: int):
+        from {{cookiecutter.project_slug}}.users.tasks import record_blacklisted_token
+
+        cache.set(self.key(jti), 1, timeout=max(1, exp - int(time.time())))
+        record_blacklisted_token.delay_on_commit(user_id, jti, token, exp)
+
+    def contains(self, jti: str) -> bool:
+        try:
+            return cache.get(self.key(jti)) is not None
+        except Exception:
+            logger.warning('blacklist cache is unavailable, checking the database')
+            return super().contains(jti)
+
+
+class BloomFilter:
+    def __init__(self, size: int, hashes: int):
+        self.size = size
+        self.hashes = hashes
+        self.bits = bytearray(size // 8)
+
+    def positions(self, value: str):
+        digest = blake2b(value.encode(), digest_size=4 * self.hashes).digest()
+        return [int.from_bytes(digest[i:i + 4], 'big') % self.size for i in range(0, len(digest), 4)]
+
+    def add(self, value: str):
+        for position in self.positions(value):
+            self.bits[position // 8] |= 128 >> position % 8
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[position // 8] & 128 >> position % 8 for position in self.positions(value))
+{%- if cookiecutter.caches == 'redis' %}
+
+
+class BloomCacheBlacklistStore(CacheBlacklistStore):
+    """
+    Puts an in-process Bloom filter in front of the cache, so most "not blacklisted" answers need no round trip.
+    The filter's bits are shared through a bitmap in the redis at JWT_BLACKLIST_BLOOM['location'], that processes
+    reload when it changed, at most every JWT_BLACKLIST_BLOOM['refresh'] seconds; a token blacklisted by another
+    process can pass for that long.
+    Tokens whose bits could not be written to redis are retried on the next add, until then every lookup of this
+    process goes to the cache.
+    """
+    bitmap_key = 'jwt_blacklist:bloom'
+    counter_key = 'jwt_blacklist:bloom:count'
+
+    def __init__(self):
+        options = settings.JWT_BLACKLIST_BLOOM
+        self.filter = BloomFilter(options['size'], options['hashes'])
+        self.refresh = options['refresh']
+        self.synced_at = 0
+        self.synced_count = None
+        self.unshared = []
+        self.lock = threading.Lock()
+        self.redis = redis.Redis.from_url(options['location'])
+
+    def period(self, offset=0) -> str:
+        # bits are never cleared, so a new bitmap starts every refresh token lifetime and the previous one expires
+        lifetime = settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME'].total_seconds()
+        return f'{self.bitmap_key}:{int(time.time() // lifetime) + offset}'
+
+    def add(self, user_id, jti: str, token: str, exp: int):
+        super().add(user_id, jti, token, exp)
+        lifetime = int(settings.SIMPLE_JWT['REFRESH_TOKEN_LIFETIME'].total_seconds())
+        with self.lock:
+            self.filter.add(jti)
+            self.unshared.append(jti)
+            unshared = list(self.unshared)
+        try:
+            pipeline = self.redis.pipeline()
+            for pending in unshared:
+                for position in self.filter.positions(pending):
+                    pipeline.setbit(self.period(), position, 1)
+            pipeline.expire(self.period(), lifetime * 2)
+            pipeline.incr(self.counter_key)
+            pipeline.execute()
+        except Exception:
+            logger.warning('could not add a blacklisted token to the shared bloom filter')
+            # the filter can't be trusted, neither here after the next sync nor in other processes
+            self.synced_at = 0
+            return
+        with self.lock:
+            self.unshared = self.unshared[len(unshared):]
+
+    def sync(self):
+        try:
+            count = self.redis.get(self.counter_key)
+            if count != self.synced_count:
+                size = len(self.filter.bits)
+                bits = 0
+                for bitmap in self.redis.mget(self.period(-1), self.period()):
+                    bits |= int.from_bytes((bitmap or b'')[:size].ljust(size, b'\0'), 'big')
+                with self.lock:
+                    self.filter.bits = bytearray(bits.to_bytes(size, 'big'))
+                self.synced_count = count
+            self.synced_at = time.monotonic()
+        except Exception:
+            logger.warning('could not sync the shared bloom filter')
+            self.synced_at = 0
+
+    def contains(self, jti: str) -> bool:
+        if time.monotonic() - self.synced_at > self.refresh:
+            self.sync()
+        if self.synced_at and not self.unshared and jti not in self.filter:
+            return False
+        return super().contains(jti)
+{%- endif %}
+
+
+_store = None
+
+
+def get_blacklist_store():
+    global _store
+    if _store is None:
+        _store = import_string(settings.JWT_BLACKLIST_STORE)()
+    return _store
+
+
+@receiver(setting_changed)
+def reset_blacklist_store(*, setting, **kwargs):
+    global _store
+    if setting in ('JWT_BLACKLIST_STORE', 'JWT_BLACKLIST_BLOOM'):
+        _store = None
@@ -1,6 +1,12 @@
 import boto3
+from botocore.exceptions import ClientError
 from django.conf import settings
 
+from {{cookiecutter.project_slug}}.metrics.instruments import instrument_s3_client
+
+# the most keys S3 deletes in one DeleteObjects call
+DELETE_BATCH_SIZE = 1000
+
 
 class SingletonBucket(type):
     _instance = None
@@ -14,13 +20,89 @@ class SingletonBucket(type):
 class Bucket(metaclass=SingletonBucket):
     def __init__(self):
         session = boto3.session.Session()
-        self.connection = session.client(
+        self.connection = instrument_s3_client(session.client(
             service_name=settings.AWS_SERVICE_NAME,
             aws_access_key_id=settings.AWS_S3_ACCESS_KEY_ID,
             aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
             endpoint_url=settings.AWS_S3_ENDPOINT_URL,
-        )
+            config=settings.AWS_S3_CLIENT_CONFIG,
+        ))
 
     def delete_object(self, key):
         self.connection.delete_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key)
         return True
+
+    def presigned_post(self, key: str, content_type: str, max_size: int, expires: int) -> dict:
+        """URL and form fields a client POSTs a file of `content_type`, at most `max_size` bytes, to `key` with."""
+        return self.connection.generate_presigned_post(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+            Key=key,
+            Fields={'Content-Type': content_type},
+            Conditions=[{'Content-Type': content_type}, ['content-length-range', 1, max_size]],
+            ExpiresIn=expires,
+        )
+
+    def get_object(self, key: str, length: int = None) -> bytes:
+        """The content of `key`, only its first `length` bytes when given."""
+        extra = {'Range': f'bytes=0-{length - 1}'} if length else {}
+        return self.connection.get_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key, **extra)['Body'].read()
+
+    def put_object(self, key: str, body: bytes, content_type: str):
+        self.connection.put_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key, Body=body,
+                                   ContentType=content_type)
+
+    def create_multipart_upload(self, key: str, content_type: str) -> str:
+        response = self.connection.create_multipart_upload(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key, ContentType=content_type
+        )
+        return response['UploadId']
+
+    def upload_part(self, key: str, upload_id: str, number: int, body: bytes) -> dict:
+        response = self.connection.upload_part(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key, UploadId=upload_id, PartNumber=number, Body=body
+        )
+        return {'ETag': response['ETag'], 'PartNumber': number}
+
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: list):
+        self.connection.complete_multipart_upload(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key, UploadId=upload_id, MultipartUpload={'Parts': parts}
+        )
+
+    def abort_multipart_upload(self, key: str, upload_id: str):
+        self.connection.abort_multipart_upload(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key, UploadId=upload_id)
+
+    def head_object(self, key: str):
+        """Metadata of `key`, None when there is no such object."""
+        try:
+            return self.connection.head_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                return None
+            raise
+
+    def iter_objects(self, prefix: str):
+        """Yields the objects under `prefix`, a page of list_objects_v2 at a time."""
+        paginator = self.connection.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Prefix=prefix):
+            yield from page.get('Contents', [])
+
+    def delete_objects(self, keys) -> list:
+        """Deletes `keys` in batches of DELETE_BATCH_SIZE, returns the keys that could not be deleted."""
+        keys = list(keys)
+        failed = []
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            response = self.connection.delete_objects(
+                Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+                Delete={'Objects': [{'Key': key} for key in keys[start:start + DELETE_BATCH_SIZE]], 'Quiet': True},
+            )
+            failed += [error['Key'] for error in response.get('Errors', [])]
+        return failed
+
+
+def delete_objects_async(keys):
+    """Deletes `keys` from a celery worker once the transaction commits, so requests never wait on S3."""
+    from {{cookiecutter.project_slug}}.users.tasks import delete_bucket_objects
+
+    keys = list(keys)
+    if keys:
+        delete_bucket_objects.delay_on_commit(keys)
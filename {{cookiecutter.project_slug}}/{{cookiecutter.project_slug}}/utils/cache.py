@@ -0,0 +1,93 @@
+import logging
+import time
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import quote_etag
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+
+def version_key(model):
+    return f'cache_version:{model._meta.label_lower}'
+
+
+def get_versions(models) -> str:
+    """Returns the current version counters of `models`, starting missing ones from the clock."""
+    keys = [version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # never restart from a small number, an evicted counter could otherwise hit old entries
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return '.'.join(str(versions[key]) for key in keys)
+
+
+def bump_version(model):
+    """
+    Invalidates every response cached for `model` without scanning keys.
+    It happens once the transaction commits, a request reading the old rows before could cache them again otherwise.
+    """
+    key = version_key(model)
+
+    def bump():
+        try:
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, time.time_ns(), timeout=None)
+        except Exception:
+            logger.warning('could not bump cache version of %s', model._meta.label)
+
+    transaction.on_commit(bump)
+
+
+class CachedListMixin:
+    """
+    Caches list responses keyed by the canonicalized query string and the user's permission scope.
+    Entries are versioned by the counters of `cache_models`, bumped from model signals.
+    Cache errors never fail the request, the response is served uncached.
+    """
+    cache_models = ()
+    cache_timeout = 60 * 5
+
+    def get_cache_scope(self):
+        user = self.request.user
+        if not user.is_authenticated:
+            return 'anonymous'
+        return f'staff={user.is_staff}:superuser={user.is_superuser}'
+
+    def get_cache_key(self):
+        params = sorted((key, sorted(values)) for key, values in self.request.query_params.lists())
+        url = f'{self.request.build_absolute_uri(self.request.path)}?{urlencode(params, doseq=True)}'
+        digest = md5(f'{self.get_cache_scope()}:{url}'.encode()).hexdigest()
+        return f'response:{self.__class__.__name__}:{get_versions(self.cache_models)}:{digest}'
+
+    def get_validator(self):
+        """ETag of the list, derived from the versioned cache key."""
+        try:
+            return quote_etag(md5(self.get_cache_key().encode()).hexdigest()), None
+        except Exception:
+            logger.warning('response cache is unavailable')
+            return None, None
+
+    def list(self, request, *args, **kwargs):
+        try:
+            key = self.get_cache_key()
+            data = cache.get(key)
+        except Exception:
+            logger.warning('response cache is unavailable')
+            return super().list(request, *args, **kwargs)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            try:
+                cache.set(key, response.data, self.cache_timeout)
+            except Exception:
+                logger.warning('response cache is unavailable')
+        return response
@@ -0,0 +1,34 @@
+{%- if cookiecutter.celery_message_broker == 'rabbitmq-server' -%}
+# rabbitmq delivers the highest priority first
+HIGH_PRIORITY, BULK_PRIORITY = 9, 0
+{%- else -%}
+# redis delivers the lowest priority first
+HIGH_PRIORITY, BULK_PRIORITY = 0, 9
+{%- endif %}
+
+TASK_QUEUES = {
+    '{{cookiecutter.project_slug}}.users.tasks.send_verification_email': 'email',
+    '{{cookiecutter.project_slug}}.users.tasks.deliver_email': 'email',
+    '{{cookiecutter.project_slug}}.users.tasks.delete_bucket_objects': 'storage',
+    '{{cookiecutter.project_slug}}.users.tasks.make_avatar_renditions': 'storage',
+    '{{cookiecutter.project_slug}}.users.tasks.record_blacklisted_token': 'maintenance',
+    '{{cookiecutter.project_slug}}.users.tasks.gc_avatars': 'maintenance',
+}
+
+# emails a user is waiting on, sent before any bulk mail
+URGENT_EMAILS = {'reset_password'}
+
+
+def route_task(name, args, kwargs, options, task=None, **kw):
+    """Celery router, puts tasks on their queue of TASK_QUEUES and urgent emails ahead of the rest."""
+    queue = TASK_QUEUES.get(name)
+    if queue is None:
+        return None
+    if queue != 'email':
+        return {'queue': queue}
+    args, kwargs = args or (), kwargs or {}
+    action = kwargs.get('action', args[2] if len(args) > 2 else None)
+    # retries of deliver_email carry the built email
+    data = kwargs.get('data', args[0] if args else None)
+    urgent = action in URGENT_EMAILS or (isinstance(data, dict) and data.get('urgent', False))
+    return {'queue': queue, 'priority': HIGH_PRIORITY if urgent else BULK_PRIORITY}
@@ -0,0 +1,30 @@
+from functools import wraps
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.permissions import SAFE_METHODS
+
+
+def conditional(method):
+    """
+    Answers conditional requests from the view's `get_validator()` before running the handler.
+    `get_validator()` returns a quoted ETag and a Last-Modified timestamp, either may be None.
+    GET answers 304 Not Modified without serializing, PATCH with a stale If-Match answers 412.
+    """
+
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validator()
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = method(self, request, *args, **kwargs)
+            if request.method not in SAFE_METHODS:
+                etag, last_modified = self.get_validator()
+        if response.status_code in (200, 304):
+            if etag:
+                response.headers['ETag'] = etag
+            if last_modified and request.method in SAFE_METHODS:
+                response.headers['Last-Modified'] = http_date(last_modified)
+        return response
+
+    return wrapper
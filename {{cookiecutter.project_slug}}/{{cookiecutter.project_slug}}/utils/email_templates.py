@@ -0,0 +1,62 @@
+import re
+import threading
+
+from django.template.loader import get_template
+from django.utils.html import conditional_escape, strip_tags
+
+SLOTS = ('receiver', 'link', 'message')
+
+
+class EmailTemplate:
+    """
+    An email template compiled once per process into static parts and per-recipient slots.
+    Rendering fills the slots of the precomputed HTML and plain-text skeletons, so the template
+    engine and strip_tags run only once. The slots must only be printed by the template, not tested or filtered.
+    """
+
+    def __init__(self, template_name: str, slots=SLOTS):
+        self.template_name = template_name
+        self.slots = slots
+        self.html = None
+        self.text = None
+        self.lock = threading.Lock()
+
+    def compile(self):
+        with self.lock:
+            if self.html is not None:
+                return
+            markers = {slot: f'EMAILSLOT{i}SLOTEND' for i, slot in enumerate(self.slots)}
+            html = get_template(self.template_name).render(markers)
+            pattern = re.compile('|'.join(markers.values()))
+            slot_of = {marker: slot for slot, marker in markers.items()}
+            self.text = self.skeleton(pattern, strip_tags(html), slot_of)
+            self.html = self.skeleton(pattern, html, slot_of)
+
+    def skeleton(self, pattern, rendered: str, slot_of: dict) -> list:
+        """Splits `rendered` into (static text, slot or None) pairs."""
+        parts = []
+        position = 0
+        for match in pattern.finditer(rendered):
+            parts.append((rendered[position:match.start()], slot_of[match.group()]))
+            position = match.end()
+        parts.append((rendered[position:], None))
+        return parts
+
+    def fill(self, skeleton: list, context: dict, escape) -> str:
+        return ''.join(static + escape(context[slot]) if slot else static for static, slot in skeleton)
+
+    def render(self, **context) -> tuple:
+        """Returns the HTML and plain-text bodies."""
+        if self.html is None:
+            self.compile()
+        return self.fill(self.html, context, conditional_escape), self.fill(self.text, context, str)
+
+
+EMAIL_TEMPLATES = {
+    'verification': EmailTemplate('emails/verification.html'),
+    'reset_password': EmailTemplate('emails/reset_password.html'),
+}
+
+
+def render_email(kind: str, **context) -> tuple:
+    return EMAIL_TEMPLATES[kind].render(**context)
@@ -0,0 +1,32 @@
+import logging
+
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_key(task, key: str) -> str:
+    return f'enqueued:{task.name}:{key}'
+
+
+def delay_once_on_commit(task, key: str, window: int, *args):
+    """
+    Enqueues `task` once the transaction commits, unless it was already enqueued under `key` in the last `window`
+    seconds. The claim is a single cache.add, an atomic SET NX EX on redis, so concurrent requests enqueue it once.
+    It is made on commit as well, a rolled back request claims nothing. A cache error lets the task through.
+{%- if cookiecutter.caches == 'none' %}
+    Without a shared cache the claim only holds within this process.
+{%- endif %}
+    """
+
+    def enqueue():
+        try:
+            claimed = cache.add(enqueue_key(task, key), 1, timeout=window)
+        except Exception:
+            logger.warning('could not deduplicate %s, enqueueing it', task.name)
+            claimed = True
+        if claimed:
+            task.delay(*args)
+
+    transaction.on_commit(enqueue)
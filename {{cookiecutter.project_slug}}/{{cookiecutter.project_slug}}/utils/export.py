@@ -0,0 +1,23 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class Echo:
+    """An object that implements just the write method of the file-like interface."""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_rows(queryset, serialize, chunk_size: int):
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        yield json.dumps(serialize(obj), cls=DjangoJSONEncoder) + '\n'
+
+
+def csv_rows(queryset, serialize, fields: list, chunk_size: int):
+    writer = csv.DictWriter(Echo(), fieldnames=fields, extrasaction='ignore')
+    yield writer.writerow(dict(zip(fields, fields)))
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        yield writer.writerow(serialize(obj))
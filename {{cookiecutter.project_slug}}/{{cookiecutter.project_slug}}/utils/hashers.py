@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+# the hasher attribute that PASSWORD_HASH_COST sets for each algorithm
+COST_ATTRIBUTES = {
+    'pbkdf2_sha256': 'iterations',
+    'argon2': 'time_cost',
+    'bcrypt_sha256': 'rounds',
+    'scrypt': 'work_factor',
+}
+
+
+class TunableCostMixin:
+    """
+    Takes its cost from settings.PASSWORD_HASH_COST when it is the PASSWORD_HASHER in use.
+    Hashes made with another cost are upgraded by Django on the next successful check_password().
+    """
+
+    def __init__(self):
+        cost = getattr(settings, 'PASSWORD_HASH_COST', None)
+        if cost and getattr(settings, 'PASSWORD_HASHER', None) == self.algorithm:
+            setattr(self, COST_ATTRIBUTES[self.algorithm], cost)
+
+
+class PBKDF2PasswordHasher(TunableCostMixin, hashers.PBKDF2PasswordHasher):
+    pass
+
+
+class Argon2PasswordHasher(TunableCostMixin, hashers.Argon2PasswordHasher):
+    pass
+
+
+class BCryptSHA256PasswordHasher(TunableCostMixin, hashers.BCryptSHA256PasswordHasher):
+    pass
+
+
+class ScryptPasswordHasher(TunableCostMixin, hashers.ScryptPasswordHasher):
+    pass
+
+
+HASHERS = {
+    hasher.algorithm: hasher
+    for hasher in (PBKDF2PasswordHasher, Argon2PasswordHasher, BCryptSHA256PasswordHasher, ScryptPasswordHasher)
+}
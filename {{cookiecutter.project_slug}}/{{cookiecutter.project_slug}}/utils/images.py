@@ -0,0 +1,41 @@
+from io import BytesIO
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# enough of the start of an image to identify it
+HEADER_SIZE = 64 * 1024
+
+# extension: (Pillow format, content type, save options)
+RENDITION_FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', 'image/jpeg', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+
+def image_content_type(header: bytes):
+    """Content type of the image starting with `header`, None when Pillow can't identify it."""
+    try:
+        with Image.open(BytesIO(header)) as image:
+            return Image.MIME.get(image.format)
+    except (UnidentifiedImageError, OSError):
+        return None
+
+
+def rendition_key(prefix: str, digest: str, size: int, extension: str) -> str:
+    """Renditions are keyed by the hash of their source, so an unchanged source maps to the same keys."""
+    return f'{prefix}/renditions/{digest}/{size}.{extension}'
+
+
+def render_renditions(data: bytes, sizes):
+    """Yields (size, extension, bytes, content type) of square crops of the image `data` in every format."""
+    with Image.open(BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+        for size in sizes:
+            resized = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            for extension, (image_format, content_type, options) in RENDITION_FORMATS.items():
+                # JPEG has no alpha channel
+                frame = resized.convert('RGB') if image_format == 'JPEG' else resized
+                output = BytesIO()
+                frame.save(output, image_format, **options)
+                yield size, extension, output.getvalue(), content_type
@@ -0,0 +1,33 @@
+from contextlib import contextmanager
+
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+
+def violated_field(exc: IntegrityError, model, fields):
+    """Returns which of `fields` a unique violation is about, from the column or constraint named in `exc`."""
+    message = str(exc)
+    table = model._meta.db_table
+    for field in fields:
+        markers = [f'{table}.{field}', f'{table}_{field}_key']
+        markers += [constraint.name for constraint in model._meta.constraints if field in constraint.name]
+        if any(marker in message for marker in markers):
+            return field
+    return None
+
+
+@contextmanager
+def unique_field_errors(model, messages: dict):
+    """
+    Lets the database unique constraints do the uniqueness checks.
+    Runs the block in a savepoint and turns unique violations of the fields in `messages`
+    into the same field errors a serializer validator would raise.
+    """
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as exc:
+        field = violated_field(exc, model, messages)
+        if field is None:
+            raise
+        raise serializers.ValidationError({field: [messages[field]]})
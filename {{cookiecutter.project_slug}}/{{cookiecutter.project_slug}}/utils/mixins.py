@@ -0,0 +1,21 @@
+from rest_framework.permissions import SAFE_METHODS
+
+
+class EagerLoadingMixin:
+    """
+    Applies the prefetch plan declared by the view's serializer to the queryset on read requests.
+    Serializers declare it with `select_related_fields` and `prefetch_related_fields`.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        serializer_class = self.get_serializer_class()
+        select_related_fields = getattr(serializer_class, 'select_related_fields', ())
+        prefetch_related_fields = getattr(serializer_class, 'prefetch_related_fields', ())
+        if select_related_fields:
+            queryset = queryset.select_related(*select_related_fields)
+        if prefetch_related_fields:
+            queryset = queryset.prefetch_related(*prefetch_related_fields)
+        return queryset
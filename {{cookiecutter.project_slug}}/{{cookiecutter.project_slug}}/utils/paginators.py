@@ -1,12 +1,145 @@
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.response import Response
+import logging
+from hashlib import md5
 from urllib.parse import urlencode
 
+from django.core.cache import cache
+from django.core.paginator import Paginator, Page, InvalidPage, PageNotAnInteger, EmptyPage
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, CursorPagination
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+
+class CachedCountPaginator(Paginator):
+    """Stores the exact count in the cache for `timeout` seconds under `cache_key`, counts each time without a cache."""
+
+    def __init__(self, object_list, per_page, *, cache_key, timeout, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_key = cache_key
+        self.timeout = timeout
+
+    @cached_property
+    def count(self):
+        try:
+            count = cache.get(self.cache_key)
+        except Exception:
+            logger.warning('count cache is unavailable')
+            return super().count
+        if count is None:
+            count = super().count
+            try:
+                cache.set(self.cache_key, count, self.timeout)
+            except Exception:
+                logger.warning('count cache is unavailable')
+        return count
+
+
+class EstimatedCountPaginator(Paginator):
+    """Uses the PostgreSQL planner estimate for unfiltered querysets, exact count otherwise."""
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'postgresql' or query.where or query.distinct or query.is_sliced:
+            return super().count
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [query.model._meta.db_table])
+            row = cursor.fetchone()
+        if row is None or row[0] < 0:
+            # table has never been analyzed
+            return super().count
+        return int(row[0])
+
+
+class UncountedPage(Page):
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+
+class UncountedPaginator(Paginator):
+    """Never counts, fetches one extra row to tell whether a next page exists."""
+    count = None
+    num_pages = None
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not object_list and number > 1:
+            raise EmptyPage('That page contains no results')
+        return UncountedPage(object_list[:self.per_page], number, self, len(object_list) > self.per_page)
+
 
 class NeatPagination(PageNumberPagination):
+    """
+    Page number pagination with a configurable count strategy.
+    Views can choose one with `pagination_count_strategy`:
+        exact: runs COUNT(*) on every request.
+        cached: caches COUNT(*) per filter/search parameters for `pagination_count_timeout` seconds.
+        estimate: uses the PostgreSQL planner estimate for unfiltered querysets.
+        none: skips counting, `items_count` and `pages_count` are null.
+    """
     page_size = 10
     max_page_size = 20
     page_size_query_param = 'limit'
+    count_strategy = 'exact'
+    count_timeout = 60
+    paginator_classes = {
+        'exact': Paginator,
+        'cached': CachedCountPaginator,
+        'estimate': EstimatedCountPaginator,
+        'none': UncountedPaginator,
+    }
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.get_paginator(queryset, page_size, view)
+        page_number = self.get_page_number(request, paginator)
+
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+
+        return list(self.page)
+
+    def get_paginator(self, queryset, page_size, view=None):
+        strategy = getattr(view, 'pagination_count_strategy', self.count_strategy)
+        paginator_class = self.paginator_classes[strategy]
+        if paginator_class is CachedCountPaginator:
+            timeout = getattr(view, 'pagination_count_timeout', self.count_timeout)
+            return paginator_class(queryset, page_size, cache_key=self.get_count_cache_key(queryset), timeout=timeout)
+        return paginator_class(queryset, page_size)
+
+    def get_count_cache_key(self, queryset):
+        ignored = (self.page_query_param, self.page_size_query_param)
+        params = sorted(
+            (key, sorted(values)) for key, values in self.request.query_params.lists() if key not in ignored
+        )
+        digest = md5(f'{self.request.path}?{urlencode(params, doseq=True)}'.encode()).hexdigest()
+        return f'pagination_count:{queryset.model._meta.db_table}:{digest}'
 
     def get_paginated_response(self, data):
         current_page = self.page.number
@@ -43,6 +176,7 @@ class NeatPagination(PageNumberPagination):
                 },
                 'pages_count': {
                     'type': 'integer',
+                    'nullable': True,
                     'example': 4,
                 },
                 'previous_page': {
@@ -77,7 +211,7 @@ class NeatPagination(PageNumberPagination):
         return self.build_page_link(1)
 
     def get_last_link(self):
-        if self.page.number == self.page.paginator.num_pages:
+        if self.page.paginator.num_pages is None or self.page.number == self.page.paginator.num_pages:
             return None
         return self.build_page_link(self.page.paginator.num_pages)
 
@@ -86,3 +220,102 @@ class NeatPagination(PageNumberPagination):
         query_params = self.request.GET.copy()
         query_params['page'] = page_number
         return f'{url}?{urlencode(query_params)}'
+
+
+class NeatCursorPagination(CursorPagination):
+    """
+    Keyset pagination with the `pagination`/`data` envelope of NeatPagination, without the page numbers and counts.
+    Seeks on the indexed ordering columns instead of using OFFSET and COUNT(*),
+    so deep pages cost the same as the first one.
+    """
+    page_size = 10
+    max_page_size = 20
+    page_size_query_param = 'limit'
+    ordering = ('email', 'id')
+
+    def get_paginated_response(self, data):
+        return Response({
+            'pagination': {
+                'previous_page': self.get_previous_link(),
+                'next_page': self.get_next_link(),
+                'has_previous': self.has_previous,
+                'has_next': self.has_next,
+            },
+            'data': data
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['pagination', 'data'],
+            'properties': {
+                'pagination': {
+                    'type': 'object',
+                    'properties': {
+                        'previous_page': {
+                            'type': 'string',
+                            'nullable': True,
+                            'format': 'uri',
+                            'example': 'http://api.example.org/accounts/?{cursor_query_param}=cD00ODY%3D'.format(
+                                cursor_query_param=self.cursor_query_param)
+                        },
+                        'next_page': {
+                            'type': 'string',
+                            'nullable': True,
+                            'format': 'uri',
+                            'example': 'http://api.example.org/accounts/?{cursor_query_param}=cj0xJnA9NDg3'.format(
+                                cursor_query_param=self.cursor_query_param)
+                        },
+                        'has_previous': {
+                            'type': 'boolean',
+                            'example': True,
+                        },
+                        'has_next': {
+                            'type': 'boolean',
+                            'example': True,
+                        },
+                    },
+                },
+                'data': schema,
+            },
+        }
+
+
+class NeatModePagination(BasePagination):
+    """
+    NeatPagination by default, NeatCursorPagination when the request asks for `?pagination=cursor`
+    or carries a cursor.
+    """
+    mode_query_param = 'pagination'
+    page_class = NeatPagination
+    cursor_class = NeatCursorPagination
+    ordering = NeatCursorPagination.ordering
+
+    def __init__(self):
+        self.paginator = self.page_class()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor_mode = (request.query_params.get(self.mode_query_param) == 'cursor'
+                       or self.cursor_class.cursor_query_param in request.query_params)
+        self.paginator = self.cursor_class() if cursor_mode else self.page_class()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_class().get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = {}
+        for paginator in (self.page_class(), self.cursor_class()):
+            for parameter in paginator.get_schema_operation_parameters(view):
+                parameters.setdefault(parameter['name'], parameter)
+        parameters[self.mode_query_param] = {
+            'name': self.mode_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Set to `cursor` for keyset pagination.',
+            'schema': {'type': 'string', 'enum': ['page', 'cursor']},
+        }
+        return list(parameters.values())
@@ -0,0 +1,88 @@
+import logging
+import threading
+import time
+
+{% if cookiecutter.caches == 'redis' or cookiecutter.celery_message_broker == 'redis' -%}
+import redis
+{% endif -%}
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# refills `rate` tokens per second up to `capacity`, takes one if available, else returns the seconds to wait
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class LocalTokenBucket:
+    """A token bucket of this process only."""
+
+    def __init__(self, name: str, rate: float, capacity: int):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> float:
+        """Takes a token, or returns how many seconds to wait before one is available."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def wait(self):
+        while delay := self.take():
+            time.sleep(delay)
+{%- if cookiecutter.caches == 'redis' or cookiecutter.celery_message_broker == 'redis' %}
+
+
+class RedisTokenBucket(LocalTokenBucket):
+    """A token bucket kept in redis, so its rate holds across every worker, per process while redis is down."""
+    clients = {}
+
+    def take(self) -> float:
+        url = settings.RATE_LIMIT_REDIS_URL
+        if url not in self.clients:
+            self.clients[url] = redis.Redis.from_url(url)
+        client = self.clients[url]
+        try:
+            return float(client.eval(TOKEN_BUCKET_SCRIPT, 1, f'token_bucket:{self.name}', self.rate, self.capacity))
+        except redis.RedisError:
+            logger.warning('could not take a token of %s from redis, limiting this process only', self.name)
+            return super().take()
+{%- endif %}
+
+
+def email_bucket():
+    """The bucket EmailBatcher takes a token from for each email, None when EMAIL_RATE_LIMIT is not set."""
+    if not settings.EMAIL_RATE_LIMIT:
+        return None
+{%- if cookiecutter.caches == 'redis' or cookiecutter.celery_message_broker == 'redis' %}
+    return RedisTokenBucket('smtp', settings.EMAIL_RATE_LIMIT, settings.EMAIL_RATE_BURST)
+{%- else %}
+    # without redis the limit holds per worker process
+    return LocalTokenBucket('smtp', settings.EMAIL_RATE_LIMIT, settings.EMAIL_RATE_BURST)
+{%- endif %}
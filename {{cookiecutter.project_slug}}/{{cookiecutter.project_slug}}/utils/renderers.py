@@ -0,0 +1,39 @@
+import decimal
+import json
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    orjson-backed drop-in replacement for DRF's JSONRenderer, byte for byte compatible for
+    datetimes, Decimals and lazy strings since those go through DRF's own encoder.
+    Indented output and data orjson can not represent fall back to JSONRenderer.
+    Known differences: NaN/Infinity floats render as null instead of raising,
+    floats in exponent notation render as 1e16 instead of 1e+16.
+    """
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def default(self, obj):
+        if isinstance(obj, decimal.Decimal):
+            # keep the stdlib float formatting of Decimals
+            return orjson.Fragment(json.dumps(float(obj), allow_nan=not self.strict))
+        return self.encoder_class().default(obj)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) is not None \
+                or self.ensure_ascii or not self.compact or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # same strict javascript subset escaping as JSONRenderer
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
@@ -1,25 +1,128 @@
+import atexit
+import logging
+import threading
+
 from django.conf import settings
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from django.core.mail import EmailMultiAlternatives, get_connection, send_mail
+
+from .celery_routing import URGENT_EMAILS
+from .email_templates import render_email
+from .rate_limit import email_bucket
+from {{cookiecutter.project_slug}}.metrics.instruments import SMTP_SEND_SECONDS
+
+logger = logging.getLogger(__name__)
 
 
-def send_link(email: str, link: str, message: str):
-    context = {
-        'receiver': email,
-        'Activation_link': link,
-        'message': message
+def build_email(kind: str, email: str, link: str, message: str) -> dict:
+    """The `kind` email carrying `link`, as a json serializable dict so it can be retried through celery."""
+    html, text = render_email(kind, receiver=email, link=link, message=message)
+    return {
+        'subject': message,
+        'body': text,
+        'from_email': settings.EMAIL_HOST_USER,
+        'to': [email],
+        'html': html,
+        'urgent': kind in URGENT_EMAILS,
     }
-    template_name = 'activation_link.html'
-    convert_to_html_context = render_to_string(
-        template_name=template_name,
-        context=context,
-    )
-    plain_message = strip_tags(convert_to_html_context)
-    send_mail(
-        subject=message,
-        message=plain_message,
-        from_email=settings.EMAIL_HOST_USER,
-        recipient_list=[email],
-        html_message=convert_to_html_context,
+
+
+def to_message(data: dict, connection=None) -> EmailMultiAlternatives:
+    message = EmailMultiAlternatives(
+        subject=data['subject'],
+        body=data['body'],
+        from_email=data['from_email'],
+        to=data['to'],
+        connection=connection,
     )
+    message.attach_alternative(data['html'], 'text/html')
+    return message
+
+
+def send_link(email: str, link: str, message: str, kind: str = 'verification'):
+    data = build_email(kind, email, link, message)
+    with SMTP_SEND_SECONDS.time():
+        send_mail(
+            subject=data['subject'],
+            message=data['body'],
+            from_email=data['from_email'],
+            recipient_list=data['to'],
+            html_message=data['html'],
+        )
+
+
+class EmailBatcher:
+    """
+    Buffers emails of a worker process and sends each batch through one SMTP connection,
+    once EMAIL_BATCH_SIZE emails are waiting or the oldest one waited EMAIL_BATCH_MAX_DELAY_MS.
+    An urgent email flushes the batch right away and is sent first.
+    A failed email does not stop the batch, it is handed to `on_failure` with its attempt number.
+    Each email waits for a token of `email_bucket`, so EMAIL_RATE_LIMIT holds across workers.
+    """
+
+    def __init__(self, on_failure=None):
+        self.on_failure = on_failure
+        self.buffer = []
+        self.lock = threading.Lock()
+        self.timer = None
+
+    def add(self, data: dict, attempt: int = 0):
+        urgent = data.get('urgent', False)
+        with self.lock:
+            if urgent:
+                self.buffer.insert(0, (data, attempt))
+            else:
+                self.buffer.append((data, attempt))
+            full = urgent or len(self.buffer) >= settings.EMAIL_BATCH_SIZE
+            if not full and self.timer is None:
+                self.timer = threading.Timer(settings.EMAIL_BATCH_MAX_DELAY_MS / 1000, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+        if full:
+            self.flush()
+
+    def flush(self) -> tuple:
+        """Sends the buffered emails, returns how many were sent and how many failed."""
+        with self.lock:
+            batch, self.buffer = self.buffer, []
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if not batch:
+            return 0, 0
+
+        sent = failed = 0
+        bucket = email_bucket()
+        connection = get_connection()
+        try:
+            for data, attempt in batch:
+                try:
+                    if bucket is not None and bucket.take():
+                        # throttled, the connection is not held open while waiting for a token
+                        connection.close()
+                        bucket.wait()
+                    with SMTP_SEND_SECONDS.time():
+                        connection.open()
+                        sent += connection.send_messages([to_message(data, connection)])
+                except Exception:
+                    failed += 1
+                    logger.warning('could not send an email to %s (attempt %s)', data['to'], attempt + 1)
+                    # a broken connection must not fail the rest of the batch
+                    connection.close()
+                    if self.on_failure is not None:
+                        self.on_failure(data, attempt + 1)
+        finally:
+            connection.close()
+        return sent, failed
+
+
+def retry_failed_email(data: dict, attempt: int):
+    from {{cookiecutter.project_slug}}.users.tasks import deliver_email
+
+    if attempt > settings.EMAIL_MAX_RETRIES:
+        logger.error('giving up on an email to %s after %s attempts', data['to'], attempt)
+        return
+    deliver_email.apply_async((data, attempt), countdown=2 ** attempt)
+
+
+email_batcher = EmailBatcher(on_failure=retry_failed_email)
+atexit.register(email_batcher.flush)
@@ -0,0 +1,97 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.tokens import BlacklistMixin
+from rest_framework_simplejwt.tokens import RefreshToken as SimpleJWTRefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .blacklist import get_blacklist_store
+
+logger = logging.getLogger(__name__)
+
+
+class OutstandingTokenBuffer:
+    """
+    Collects OutstandingToken rows and writes them with one bulk_create per batch,
+    when the batch is full or OUTSTANDING_TOKENS_MAX_DELAY seconds after its first row.
+    A row that was not written yet does not weaken anything: blacklisting a token
+    creates its OutstandingToken row when it is missing.
+    """
+
+    def __init__(self):
+        self.rows = []
+        self.lock = threading.Lock()
+        self.timer = None
+
+    def add(self, row: OutstandingToken):
+        with self.lock:
+            self.rows.append(row)
+            full = len(self.rows) >= settings.OUTSTANDING_TOKENS_BATCH_SIZE
+            if not full and self.timer is None:
+                self.timer = threading.Timer(settings.OUTSTANDING_TOKENS_MAX_DELAY, self.flush_on_timer)
+                self.timer.daemon = True
+                self.timer.start()
+        if full:
+            self.flush()
+
+    def flush_on_timer(self):
+        try:
+            self.flush()
+        finally:
+            # the timer's thread has a database connection of its own
+            connection.close()
+
+    def flush(self):
+        with self.lock:
+            rows, self.rows = self.rows, []
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if not rows:
+            return
+        try:
+            OutstandingToken.objects.bulk_create(rows, ignore_conflicts=True)
+        except DatabaseError:
+            logger.warning('could not write %s outstanding tokens', len(rows))
+
+
+outstanding_tokens = OutstandingTokenBuffer()
+atexit.register(outstanding_tokens.flush)
+
+
+class RefreshToken(SimpleJWTRefreshToken):
+    """
+    A RefreshToken that blacklists through JWT_BLACKLIST_STORE, and whose OutstandingToken row
+    goes through `outstanding_tokens` when OUTSTANDING_TOKENS_BATCH_SIZE is set.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        if not settings.OUTSTANDING_TOKENS_BATCH_SIZE:
+            return super().for_user(user)
+
+        # skips BlacklistMixin.for_user, which inserts the row right away
+        token = super(BlacklistMixin, cls).for_user(user)
+        outstanding_tokens.add(OutstandingToken(
+            user=user,
+            jti=token[api_settings.JTI_CLAIM],
+            token=str(token),
+            created_at=token.current_time,
+            expires_at=datetime_from_epoch(token['exp']),
+        ))
+        return token
+
+    def check_blacklist(self):
+        if get_blacklist_store().contains(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+        get_blacklist_store().add(user_id, self.payload[api_settings.JTI_CLAIM], str(self), self.payload['exp'])
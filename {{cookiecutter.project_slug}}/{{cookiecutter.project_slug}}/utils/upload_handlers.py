@@ -0,0 +1,104 @@
+import logging
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopFutureHandlers
+
+from .bucket import Bucket, delete_objects_async
+from .images import image_content_type
+
+logger = logging.getLogger(__name__)
+
+
+class S3UploadedFile(UploadedFile):
+    """A file streamed to the bucket while the request was parsed, only its `key` is kept."""
+
+    def __init__(self, key, name, content_type, size):
+        super().__init__(file=BytesIO(), name=name, content_type=content_type, size=size)
+        self.key = key
+
+
+class S3MultipartImageUploadHandler(FileUploadHandler):
+    """
+    Streams uploaded images to the bucket as S3 multipart uploads while the body is parsed,
+    so at most one part of AWS_S3_UPLOAD_PART_SIZE bytes is held in memory per upload.
+    `key_for(content_type)` names the object. Files of fields other than `field_names`, which are not an image of
+    `content_types`, or are larger than `max_size`, are skipped and recorded in `rejected` by field name.
+    `discard()` deletes what was uploaded.
+    """
+
+    def __init__(self, request, key_for, content_types, max_size, field_names):
+        super().__init__(request)
+        self.key_for = key_for
+        self.field_names = field_names
+        self.content_types = content_types
+        self.max_size = max_size
+        self.rejected = {}
+        self.uploaded = []
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.key = self.upload_id = None
+        self.buffer = bytearray()
+        self.parts = []
+        self.size = 0
+        if self.field_name not in self.field_names:
+            self.reject('No file was expected in this field.')
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.key is None:
+            self.start_upload(raw_data)
+        self.size += len(raw_data)
+        if self.size > self.max_size:
+            self.reject(f'Ensure the file is at most {self.max_size} bytes.')
+        self.buffer += raw_data
+        if len(self.buffer) >= settings.AWS_S3_UPLOAD_PART_SIZE:
+            self.upload_part()
+        return None
+
+    def start_upload(self, first_chunk):
+        # the header is in the first chunk, a disguised file is rejected before anything is sent
+        content_type = image_content_type(first_chunk)
+        if content_type not in self.content_types or content_type != self.content_type:
+            self.reject('Upload a valid image. The file you uploaded was either not an image or a corrupted image.')
+        self.key = self.key_for(content_type)
+        self.upload_id = Bucket().create_multipart_upload(self.key, content_type)
+
+    def upload_part(self):
+        self.parts.append(Bucket().upload_part(self.key, self.upload_id, len(self.parts) + 1, bytes(self.buffer)))
+        self.buffer.clear()
+
+    def file_complete(self, file_size):
+        if self.upload_id is None:
+            return None
+        if self.buffer or not self.parts:
+            self.upload_part()
+        Bucket().complete_multipart_upload(self.key, self.upload_id, self.parts)
+        self.uploaded.append(self.key)
+        return S3UploadedFile(self.key, self.file_name, self.content_type, file_size)
+
+    def reject(self, message):
+        self.rejected[self.field_name] = [message]
+        self.abort()
+        raise SkipFile()
+
+    def abort(self):
+        if self.upload_id is not None:
+            try:
+                Bucket().abort_multipart_upload(self.key, self.upload_id)
+            except Exception:
+                logger.warning('could not abort the multipart upload of %s', self.key)
+        self.key = self.upload_id = None
+        self.buffer.clear()
+
+    def upload_interrupted(self):
+        self.abort()
+
+    def discard(self):
+        """Deletes the completed uploads of a request that failed validation."""
+        if not self.uploaded:
+            return
+        delete_objects_async(self.uploaded)
+        self.uploaded = []